@@ -0,0 +1,127 @@
+"""History import throughput benchmark against the offline portal simulator.
+
+Run from the repository root (Home Assistant and aiohttp must be installed):
+
+    python benchmarks/bench_import.py [--days N] [--latency-ms MS]
+
+Fetches ``--days`` days of hourly data (24 rows each) the way the backfill
+engine does, then again from the on-disk reading cache, and turns them into
+statistics rows with leak detection, usage rollups and the bill estimate.
+Finally it queries the rollup totals of every period, which must agree. Rows
+are built exactly as they are passed to the recorder; the recorder itself is
+not started, so database write time is not included.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import date, timedelta
+import sys
+import time
+
+from harness import (
+    LoopLagMonitor,
+    PortalSimulator,
+    async_start_hass,
+    create_coordinator,
+    make_entry,
+    point_integration_at,
+    set_rate_limit,
+)
+
+from custom_components.fort_worth_myh2o.cache import ReadingCache
+from custom_components.fort_worth_myh2o.const import BACKFILL_CONCURRENCY
+from custom_components.fort_worth_myh2o.fetcher import async_fetch_cumulative_readings_for_date
+from custom_components.fort_worth_myh2o.historical_import import ImportedStatistics, _build_rows
+from custom_components.fort_worth_myh2o.cost import CostEngine, parse_tiers
+from custom_components.fort_worth_myh2o.leak import LeakDetector
+from custom_components.fort_worth_myh2o.rollup import PERIODS, RollupIndex
+
+
+def _report(name: str, rows: int, elapsed: float, lag: LoopLagMonitor, requests: int | None = None) -> None:
+    requests_column = f"{requests:9d}" if requests is not None else f"{'-':>9}"
+    print(
+        f"{name:16} {rows:8d} {requests_column} {elapsed * 1000:10.1f} {rows / elapsed:12.0f}"
+        f" {lag.max_ms:8.2f} {lag.blocked_ms:9.2f}"
+    )
+
+
+async def _fetch_days(session, days: list[date], cache: ReadingCache) -> list:
+    semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+
+    async def _fetch(day: date):
+        async with semaphore:
+            return await async_fetch_cumulative_readings_for_date(session, day, cache)
+
+    return await asyncio.gather(*(_fetch(day) for day in days))
+
+
+async def _bench(opts: argparse.Namespace) -> int:
+    hass = await async_start_hass()
+    set_rate_limit(hass, opts.requests_per_minute)
+    sim = PortalSimulator(latency=opts.latency_ms / 1000)
+    point_integration_at(await sim.start())
+    entry = make_entry("bench")
+    coordinator = create_coordinator(hass, entry)
+    cache = ReadingCache(hass, "bench")
+    await cache.async_load()
+
+    end = date.today() - timedelta(days=1)
+    days = [end - timedelta(days=offset) for offset in range(opts.days - 1, -1, -1)]
+    print(f"{'phase':16} {'rows':>8} {'requests':>9} {'total ms':>10} {'rows/s':>12} {'max lag':>8} {'blocked':>9}")
+    try:
+        requests = sim.total_requests
+        with LoopLagMonitor() as lag:
+            start = time.perf_counter()
+            batches = await _fetch_days(coordinator.session, days, cache)
+            elapsed = time.perf_counter() - start
+        _report("fetch (portal)", sum(map(len, batches)), elapsed, lag, sim.total_requests - requests)
+
+        requests = sim.total_requests
+        with LoopLagMonitor() as lag:
+            start = time.perf_counter()
+            batches = await _fetch_days(coordinator.session, days, cache)
+            elapsed = time.perf_counter() - start
+        _report("fetch (cache)", sum(map(len, batches)), elapsed, lag, sim.total_requests - requests)
+
+        detector = LeakDetector(hass, entry.entry_id)
+        rollups = RollupIndex(hass, entry.entry_id, 1)
+        cost = CostEngine(hass, entry.entry_id, 1, parse_tiers("2000:3.12, 10000:4.50, 5.80"), parse_tiers("6.00"), 20.0)
+        with LoopLagMonitor() as lag:
+            start = time.perf_counter()
+            rows, _, anomalies = _build_rows(batches, ImportedStatistics([], []), detector, rollups, cost)
+            elapsed = time.perf_counter() - start
+        _report("build rows", len(rows), elapsed, lag)
+
+        with LoopLagMonitor() as lag:
+            start = time.perf_counter()
+            totals = [rollups.query(period)["total"] for period in PERIODS]
+            elapsed = time.perf_counter() - start
+        _report("query rollups", len(PERIODS), elapsed, lag)
+        if anomalies:
+            print(f"anomalies: {anomalies}", file=sys.stderr)
+    finally:
+        await coordinator.async_shutdown()
+        await sim.stop()
+        await hass.async_stop(force=True)
+
+    expected = opts.days * 24
+    if len(rows) != expected:
+        print(f"FAILED: expected {expected} rows, built {len(rows)}", file=sys.stderr)
+        return 1
+    if len({round(total, 1) for total in totals}) != 1:
+        print(f"FAILED: rollup totals differ: {totals}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main() -> int:
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--days", type=int, default=180)
+    args.add_argument("--latency-ms", type=float, default=50)
+    args.add_argument("--requests-per-minute", type=float, default=0, help="0 disables the rate limiter")
+    return asyncio.run(_bench(args.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Compare the single-pass usage parser with the original BeautifulSoup parser.
+
+Run from the repository root:
+
+    python benchmarks/bench_parser.py [--iterations N] [--viewstate-kb KB]
+
+Every fixture in ``benchmarks/fixtures`` is parsed by both implementations.
+The script reports the mean time per parse and fails if a value the new
+parser found differs from the original. The new parser leaves a field empty
+instead of guessing, so fields the original only guessed are not compared.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import re
+import sys
+import timeit
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+PARSER_PATH = ROOT / "custom_components" / "fort_worth_myh2o" / "parser.py"
+
+
+def load_parser():
+    """Import parser.py on its own so Home Assistant does not need to be installed."""
+    spec = importlib.util.spec_from_file_location("myh2o_parser", PARSER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def legacy_parse_usage(html: str) -> dict:
+    """The parser the coordinator used before the single-pass engine."""
+    soup = BeautifulSoup(html, "html.parser")
+    data = {"current_reading": None, "daily_usage": None, "monthly_usage": None, "account": None}
+
+    text = soup.get_text(" ", strip=True)
+
+    numbers = re.findall(r"[0-9,.]+", text)
+
+    def to_float(s: str) -> float | None:
+        try:
+            return float(s.replace(",", ""))
+        except Exception:
+            return None
+
+    for label in ["Total", "Reading", "Current", "Meter"]:
+        idx = text.find(label)
+        if idx != -1:
+            nearby = text[idx: idx + 200]
+            m = re.search(r"([0-9,.]+)", nearby)
+            if m:
+                val = to_float(m.group(1))
+                if val is not None:
+                    data["current_reading"] = val
+                    break
+
+    if data["current_reading"] is None and numbers:
+        val = max((to_float(n) or 0) for n in numbers)
+        data["current_reading"] = val
+
+    daily_match = re.search(r"Last\s*24\s*Hours[^0-9]*([0-9,.]+)", text, re.IGNORECASE)
+    if daily_match:
+        data["daily_usage"] = to_float(daily_match.group(1))
+
+    month_match = re.search(r"This\s*Month[^0-9]*([0-9,.]+)", text, re.IGNORECASE)
+    if month_match:
+        data["monthly_usage"] = to_float(month_match.group(1))
+
+    acc_match = re.search(r"Account[:#]*\s*([A-Za-z0-9-]+)", text, re.IGNORECASE)
+    if acc_match:
+        data["account"] = acc_match.group(1)
+
+    return data
+
+
+def inflate_viewstate(html: str, kilobytes: int) -> str:
+    """Pad __VIEWSTATE so a fixture approaches the size of a real portal page."""
+    if kilobytes <= 0:
+        return html
+    padding = ("/wEPDwUKMTY3NzE5MjIwMw9kFgJmD2QWAgIDD2Q" * (kilobytes * 1024 // 40 + 1))[: kilobytes * 1024]
+    return html.replace('id="__VIEWSTATE" value="', f'id="__VIEWSTATE" value="{padding}', 1)
+
+
+def main() -> int:
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--iterations", type=int, default=200)
+    args.add_argument("--viewstate-kb", type=int, default=256)
+    opts = args.parse_args()
+
+    parser = load_parser()
+    backends = ["regex"] + (["lxml"] if parser.LXML_AVAILABLE else [])
+    failures = 0
+
+    print(f"{'fixture':28} {'legacy ms':>10} " + " ".join(f"{b + ' ms':>10} {'speedup':>8}" for b in backends))
+    for path in sorted(FIXTURES.glob("usages_*.html")):
+        html = inflate_viewstate(path.read_text(encoding="utf-8"), opts.viewstate_kb)
+        expected = legacy_parse_usage(html)
+        legacy = timeit.timeit(lambda: legacy_parse_usage(html), number=opts.iterations) / opts.iterations
+
+        columns = []
+        for backend in backends:
+            result = parser.parse_usage(html, backend)
+            if any(value is not None and value != expected[key] for key, value in result.items()):
+                failures += 1
+                print(f"MISMATCH {path.name} [{backend}]: {result} != {expected}", file=sys.stderr)
+            elapsed = timeit.timeit(lambda: parser.parse_usage(html, backend), number=opts.iterations) / opts.iterations
+            columns.append(f"{elapsed * 1000:10.3f} {legacy / elapsed:7.1f}x")
+
+        print(f"{path.name:28} {legacy * 1000:10.3f} " + " ".join(columns))
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
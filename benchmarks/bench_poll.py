@@ -0,0 +1,140 @@
+"""End-to-end poll benchmark against the offline portal simulator.
+
+Run from the repository root (Home Assistant and aiohttp must be installed):
+
+    python benchmarks/bench_poll.py [--iterations N] [--latency-ms MS] [--accounts N] [--no-compress]
+
+Each scenario drives the real coordinator through ``async_refresh`` and
+reports requests per poll, poll latency (mean / p95), parse time per poll,
+bytes per poll as received on the wire, event-loop blocking and the peak
+Python memory of one more, untimed poll traced with tracemalloc (the
+simulator runs in the same process, so this includes its allocations). A last
+row per simulator times a restart that restores the saved data instead of
+polling. Exits 1 if any poll fails.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from harness import (
+    LoopLagMonitor,
+    PortalSimulator,
+    async_start_hass,
+    create_coordinator,
+    make_entry,
+    point_integration_at,
+    set_rate_limit,
+    summarize,
+)
+
+from custom_components.fort_worth_myh2o.metrics import PHASE_PARSE
+
+
+async def _run_scenario(name, sim, coordinator, iterations, before_poll) -> bool:
+    requests = sim.total_requests
+    logins = sim.logins
+    parse_total = coordinator.metrics.phases[PHASE_PARSE].total
+    received = coordinator.metrics.bytes_received
+    latencies = []
+    ok = True
+    with LoopLagMonitor() as lag:
+        for _ in range(iterations):
+            before_poll()
+            start = time.perf_counter()
+            await coordinator.async_refresh()
+            latencies.append(time.perf_counter() - start)
+            if not coordinator.last_update_success:
+                ok = False
+                print(f"FAILED {name}: {coordinator.last_exception}", file=sys.stderr)
+    row = (
+        f"{name:22} {(sim.total_requests - requests) / iterations:9.2f} {(sim.logins - logins) / iterations:7.2f}"
+        f" {summarize(latencies):>19}"
+        f" {(coordinator.metrics.phases[PHASE_PARSE].total - parse_total) / iterations * 1000:9.2f}"
+        f" {(coordinator.metrics.bytes_received - received) / iterations / 1024:9.1f}"
+        f" {lag.max_ms:8.2f} {lag.blocked_ms:9.2f}"
+    )
+    before_poll()
+    tracemalloc.start()
+    await coordinator.async_refresh()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{row} {peak / 1024:9.0f}")
+    return ok
+
+
+async def _run_restart(name, sim, hass, entry) -> bool:
+    """Time how long a restarted entry takes to have data when it restores the last saved payload."""
+    requests = sim.total_requests
+    coordinator = create_coordinator(hass, entry)
+    with LoopLagMonitor() as lag:
+        start = time.perf_counter()
+        restored = await coordinator.async_restore()
+        elapsed = time.perf_counter() - start
+    await coordinator.async_shutdown()
+    print(
+        f"{name:22} {sim.total_requests - requests:9.2f} {0:7.2f} {summarize([elapsed]):>19}"
+        f" {0:9.2f} {0:9.1f} {lag.max_ms:8.2f} {lag.blocked_ms:9.2f} {'-':>9}"
+    )
+    if not restored:
+        print(f"FAILED {name}: no saved data to restore", file=sys.stderr)
+    return restored
+
+
+async def _bench(opts: argparse.Namespace) -> int:
+    hass = await async_start_hass()
+    set_rate_limit(hass, opts.requests_per_minute)
+    print(
+        f"{'scenario':22} {'req/poll':>9} {'logins':>7} {'latency ms avg/p95':>19}"
+        f" {'parse ms':>9} {'KiB/poll':>9} {'max lag':>8} {'blocked':>9} {'peak KiB':>9}"
+    )
+    ok = True
+    for accounts in sorted({1, opts.accounts}):
+        sim = PortalSimulator(
+            latency=opts.latency_ms / 1000,
+            viewstate_kb=opts.viewstate_kb,
+            accounts=accounts,
+            tail_kb=opts.tail_kb,
+            compress=not opts.no_compress,
+        )
+        point_integration_at(await sim.start())
+        entry = make_entry(f"bench{accounts}")
+        coordinator = create_coordinator(hass, entry)
+        suffix = f" x{accounts}" if accounts > 1 else ""
+        scenarios = (
+            # A new install: no saved cookies, so every poll starts with a login
+            ("first poll" + suffix, 1, lambda: None),
+            ("new reading" + suffix, opts.iterations, sim.publish),
+            ("unchanged" + suffix, opts.iterations, lambda: None),
+            ("expired session" + suffix, opts.iterations, lambda: (sim.expire_sessions(), sim.publish())),
+        )
+        try:
+            for name, iterations, before_poll in scenarios:
+                ok &= await _run_scenario(name, sim, coordinator, iterations, before_poll)
+            # Shutting down saves the data the restarted entry restores
+            await coordinator.async_shutdown()
+            ok &= await _run_restart("restored start" + suffix, sim, hass, entry)
+        finally:
+            await coordinator.async_shutdown()
+            await sim.stop()
+    await hass.async_stop(force=True)
+    return 0 if ok else 1
+
+
+def main() -> int:
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--iterations", type=int, default=20)
+    args.add_argument("--latency-ms", type=float, default=50)
+    args.add_argument("--viewstate-kb", type=int, default=256)
+    args.add_argument("--accounts", type=int, default=3)
+    args.add_argument("--tail-kb", type=int, default=128, help="size of the scripts after the usage form")
+    args.add_argument("--no-compress", action="store_true", help="the simulator never gzips responses")
+    args.add_argument("--requests-per-minute", type=float, default=0, help="0 disables the rate limiter")
+    return asyncio.run(_bench(args.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Shared setup for the end-to-end benchmarks: a bare Home Assistant core, the
+integration pointed at the portal simulator, and an event-loop lag monitor.
+
+Home Assistant must be installed; nothing in it is mocked. Only the portal
+URLs are redirected to the simulator.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import MappingProxyType
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from homeassistant import config_entries, loader  # noqa: E402
+from homeassistant.components.recorder import get_instance  # noqa: E402
+from homeassistant.components.recorder.tasks import SynchronizeTask  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import (  # noqa: E402
+    area_registry,
+    device_registry,
+    entity_registry,
+    floor_registry,
+    issue_registry,
+    label_registry,
+    recorder as recorder_helper,
+    translation,
+)
+from homeassistant.setup import async_setup_component  # noqa: E402
+
+from custom_components.fort_worth_myh2o import const, session as session_module  # noqa: E402
+from custom_components.fort_worth_myh2o.client import get_http_client  # noqa: E402
+from custom_components.fort_worth_myh2o.coordinator import FWMH2ODataUpdateCoordinator  # noqa: E402
+
+from portal_sim import HOURLY_PATH, LOGIN_PATH, USAGE_PATH, PortalSimulator  # noqa: E402
+
+
+class LoopLagMonitor:
+    """Measure how long the event loop was blocked while the benchmark ran.
+
+    A task asks to wake up every ``interval`` seconds; any extra delay is time
+    the loop spent running something else without yielding.
+    """
+
+    def __init__(self, interval: float = 0.002) -> None:
+        self.interval = interval
+        self.lags: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def __enter__(self) -> LoopLagMonitor:
+        self.lags.clear()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._task.cancel()
+
+    @property
+    def max_ms(self) -> float:
+        return max(self.lags, default=0.0) * 1000
+
+    @property
+    def blocked_ms(self) -> float:
+        """Total lag from stalls longer than 10 ms, the usual "blocking" threshold."""
+        return sum(lag for lag in self.lags if lag > 0.01) * 1000
+
+
+def summarize(samples: list[float]) -> str:
+    """Mean and p95 of timings in seconds, formatted in milliseconds."""
+    if not samples:
+        return "-"
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"{statistics.fmean(samples) * 1000:8.2f} / {p95 * 1000:8.2f}"
+
+
+async def async_start_hass() -> HomeAssistant:
+    """Return a Home Assistant core using a throwaway config directory."""
+    return HomeAssistant(tempfile.mkdtemp(prefix="myh2o-bench-"))
+
+
+async def async_start_recorder(hass: HomeAssistant) -> None:
+    """Set up the recorder on a SQLite file in the config directory and start Home Assistant."""
+    loader.async_setup(hass)
+    translation.async_setup(hass)
+    recorder_helper.async_initialize_recorder(hass)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    for registry in (area_registry, floor_registry, label_registry, device_registry, entity_registry, issue_registry):
+        await registry.async_load(hass)
+    db_url = f"sqlite:///{hass.config.path('home-assistant_v2.db')}"
+    if not await async_setup_component(hass, "recorder", {"recorder": {"db_url": db_url, "commit_interval": 0}}):
+        raise RuntimeError("recorder setup failed")
+    await hass.async_start()
+    await get_instance(hass).async_db_ready
+    await get_instance(hass).async_recorder_ready.wait()
+
+
+async def async_recorder_done(hass: HomeAssistant) -> None:
+    """Wait until the recorder has committed everything queued so far.
+
+    The recorder's own ``async_block_till_done`` returns as soon as its queue
+    is empty, even while the last task is still being written.
+    """
+    done = asyncio.Event()
+    get_instance(hass).queue_task(SynchronizeTask(done))
+    await done.wait()
+
+
+def point_integration_at(base_url: str) -> None:
+    """Send the integration's portal requests to the simulator."""
+    session_module.LOGIN_URL = f"{base_url}{LOGIN_PATH}"
+    session_module.USAGE_URL = f"{base_url}{USAGE_PATH}?type=WU"
+    session_module.HOURLY_USAGE_URL = f"{base_url}{HOURLY_PATH}"
+
+
+def make_entry(username: str = "bench", password: str = "bench") -> config_entries.ConfigEntry:
+    """Build a config entry for the integration, across Home Assistant versions."""
+    kwargs = {
+        "version": 1,
+        "minor_version": 1,
+        "domain": const.DOMAIN,
+        "title": username,
+        "data": {"username": username, "password": password},
+        "options": {},
+        "source": config_entries.SOURCE_USER,
+        "unique_id": None,
+        "discovery_keys": MappingProxyType({}),
+        "subentries_data": None,
+    }
+    accepted = inspect.signature(config_entries.ConfigEntry).parameters
+    return config_entries.ConfigEntry(**{key: value for key, value in kwargs.items() if key in accepted})
+
+
+def create_coordinator(hass: HomeAssistant, entry: config_entries.ConfigEntry) -> FWMH2ODataUpdateCoordinator:
+    """Create a coordinator registered in hass.data like the config entry does."""
+    coordinator = FWMH2ODataUpdateCoordinator(hass, entry)
+    hass.data.setdefault(const.DOMAIN, {})[entry.entry_id] = coordinator
+    return coordinator
+
+
+def set_rate_limit(hass: HomeAssistant, requests_per_minute: float) -> None:
+    """Set the shared rate limit; 0 removes it so the benchmark measures the code, not the limiter."""
+    rate = requests_per_minute / 60 if requests_per_minute else 1e9
+    get_http_client(hass).limiter.configure(rate, 1_000_000 if not requests_per_minute else const.RATE_LIMIT_BURST)
+
@@ -0,0 +1,278 @@
+"""Offline stand-in for the MyH2O portal, for benchmarks and local testing.
+
+Serves the three endpoints the integrations use:
+
+* ``/portal/login.aspx``: the ASP.NET login form (GET) and login (POST).
+* ``/portal/usages.aspx``: the usage page (GET) and the account postback (POST).
+  It supports ETag/If-None-Match and an account drop-down when there is more
+  than one account.
+* ``/portal/Usages.aspx/LoadWaterUsage``: the hourly chart page method (POST JSON).
+
+Requests without a live session are redirected to the login page, like the
+real portal. Responses are gzip-compressed when the client accepts it.
+Latency, session lifetime, view state size, the size of the scripts after the
+usage form and the number of accounts are configurable. Run it on its own with:
+
+    python benchmarks/portal_sim.py --port 8080 --latency-ms 150
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime
+import gzip
+import hashlib
+import json
+import random
+import secrets
+import time
+
+from aiohttp import web
+
+# Must match the field names in custom_components/fort_worth_myh2o/session.py
+USERNAME_FIELD = "ctl00$ContentPlaceHolder1$txtUsername"
+PASSWORD_FIELD = "ctl00$ContentPlaceHolder1$txtPassword"
+ACCOUNT_FIELD = "ctl00$ContentPlaceHolder1$ddlAccount"
+SESSION_COOKIE = "ASP.NET_SessionId"
+SELECTED = ' selected="selected"'
+
+LOGIN_PATH = "/portal/login.aspx"
+USAGE_PATH = "/portal/usages.aspx"
+HOURLY_PATH = "/portal/Usages.aspx/LoadWaterUsage"
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>MyH2O - Login</title></head><body>
+<form method="post" action="./login.aspx" id="form1">
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />
+<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="C2EE9ABB" />
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="/wEdAAT5mJ1g" />
+<input name="{username}" type="text" id="txtUsername" />
+<input name="{password}" type="password" id="txtPassword" />
+<input type="submit" name="ctl00$ContentPlaceHolder1$btnLogin" value="Sign In" />
+</form></body></html>
+"""
+
+USAGE_PAGE = """<!DOCTYPE html>
+<html><head><title>MyH2O - Usage</title>
+<script type="text/javascript">var requestId = "{request_id}";</script></head>
+<body><form method="post" action="./usages.aspx?type=WU" id="form1">
+<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="" />
+<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="" />
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="/wEdAAOdjf8K" />
+{selector}
+<div class="usage-panel">
+  <div class="account-info">Account: {account}</div>
+  <div class="usage-tile"><span class="label">Meter Reading</span> <span>{reading:,.1f}</span> gal</div>
+  <div class="usage-tile"><span class="label">Last 24 Hours</span> <span>{daily:,.1f}</span> gal</div>
+  <div class="usage-tile"><span class="label">This Month</span> <span>{monthly:,.1f}</span> gal</div>
+</div>
+</form>
+{tail}
+</body></html>
+"""
+
+
+@dataclass
+class Account:
+    number: str
+    reading: float
+    daily: float = 0.0
+    monthly: float = 0.0
+
+
+@dataclass
+class PortalSimulator:
+    """The simulated portal; ``start()`` returns its base URL."""
+
+    latency: float = 0.0
+    session_ttl: float = 1200.0
+    viewstate_kb: int = 64
+    accounts: int = 1
+    # Render the account drop-down even for a single account, as some logins get it
+    single_account_selector: bool = False
+    # Inline scripts after the usage form, like the portal's chart and menu scripts
+    tail_kb: int = 0
+    compress: bool = True
+    seed: int = 1
+    requests: Counter = field(default_factory=Counter)
+    bytes_sent: int = 0
+    logins: int = 0
+
+    def __post_init__(self) -> None:
+        self._rng = random.Random(self.seed)
+        self._sessions: dict[str, float] = {}
+        self._accounts = [
+            Account(f"{100000 + i * 7919}-{1000 + i}", 100_000.0 * (i + 1)) for i in range(self.accounts)
+        ]
+        self._viewstate = secrets.token_urlsafe(self.viewstate_kb * 768)[: self.viewstate_kb * 1024]
+        script = "var chartData = [" + ",".join(str(self._rng.randint(0, 999)) for _ in range(self.tail_kb * 256)) + "];"
+        self._tail = f'<script type="text/javascript">{script[: self.tail_kb * 1024]}</script>' if self.tail_kb else ""
+        self.publish()
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    # Control -------------------------------------------------------------
+
+    def publish(self) -> None:
+        """Publish a new reading on every account, changing the usage pages."""
+        for account in self._accounts:
+            step = round(self._rng.uniform(0, 40), 1)
+            account.reading += step
+            account.daily = round(self._rng.uniform(80, 250), 1)
+            account.monthly += step
+
+    def expire_sessions(self) -> None:
+        """Drop every session, as if the portal had restarted."""
+        self._sessions.clear()
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get(LOGIN_PATH, self._login_form)
+        app.router.add_post(LOGIN_PATH, self._login)
+        app.router.add_get(USAGE_PATH, self._usage)
+        app.router.add_post(USAGE_PATH, self._usage)
+        app.router.add_post(HOURLY_PATH, self._hourly)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        # A host name, because aiohttp's default cookie jar ignores cookies from IP addresses
+        self.base_url = f"http://localhost:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    # Handlers ------------------------------------------------------------
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        self.requests[(request.method, request.path)] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        resp = await handler(request)
+        if isinstance(resp, web.Response) and resp.body is not None:
+            if self.compress and "gzip" in request.headers.get("Accept-Encoding", ""):
+                # Compressed here rather than by aiohttp so bytes_sent counts what goes on the wire
+                resp.body = await asyncio.get_running_loop().run_in_executor(None, gzip.compress, resp.body, 6)
+                resp.headers["Content-Encoding"] = "gzip"
+            self.bytes_sent += len(resp.body)
+        return resp
+
+    def _has_session(self, request: web.Request) -> bool:
+        expires = self._sessions.get(request.cookies.get(SESSION_COOKIE, ""))
+        return expires is not None and expires > time.monotonic()
+
+    async def _login_form(self, request: web.Request) -> web.Response:
+        html = LOGIN_PAGE.format(viewstate=self._viewstate[:2048], username=USERNAME_FIELD, password=PASSWORD_FIELD)
+        return web.Response(text=html, content_type="text/html")
+
+    async def _login(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        if not form.get(USERNAME_FIELD) or not form.get(PASSWORD_FIELD):
+            raise web.HTTPFound(LOGIN_PATH)
+        session_id = secrets.token_hex(12)
+        self._sessions[session_id] = time.monotonic() + self.session_ttl
+        self.logins += 1
+        resp = web.Response(text="<html><body>Welcome</body></html>", content_type="text/html")
+        resp.set_cookie(SESSION_COOKIE, session_id, httponly=True)
+        return resp
+
+    async def _usage(self, request: web.Request) -> web.Response:
+        if not self._has_session(request):
+            raise web.HTTPFound(LOGIN_PATH)
+        account = self._accounts[0]
+        if request.method == "POST":
+            form = await request.post()
+            account = next((a for a in self._accounts if a.number == form.get(ACCOUNT_FIELD)), account)
+
+        etag = '"{}"'.format(
+            hashlib.blake2b(f"{account}".encode() + self._viewstate[:64].encode(), digest_size=8).hexdigest()
+        )
+        if request.method == "GET" and request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+
+        selector = ""
+        if len(self._accounts) > 1 or self.single_account_selector:
+            options = "".join(
+                f'<option{SELECTED if a is account else ""} value="{a.number}">{a.number}</option>'
+                for a in self._accounts
+            )
+            selector = f'<select name="{ACCOUNT_FIELD}" id="ddlAccount">{options}</select>'
+        html = USAGE_PAGE.format(
+            request_id=secrets.token_hex(8),
+            viewstate=self._viewstate,
+            selector=selector,
+            account=account.number,
+            reading=account.reading,
+            daily=account.daily,
+            monthly=account.monthly,
+            tail=self._tail,
+        )
+        return web.Response(text=html, content_type="text/html", headers={"ETag": etag})
+
+    async def _hourly(self, request: web.Request) -> web.Response:
+        if not self._has_session(request):
+            raise web.HTTPFound(LOGIN_PATH)
+        payload = await request.json()
+        day = datetime.strptime(payload["strDate"], "%m/%d/%Y").date()
+        rows = [
+            {"Hourly": datetime(2000, 1, 1, hour).strftime("%I:%M %p"), "UsageValue": usage}
+            for hour, usage in enumerate(hourly_usage(day))
+        ]
+        return web.json_response({"d": json.dumps(rows)})
+
+
+def hourly_usage(day: date) -> list[float]:
+    """Deterministic hourly gallons for ``day``, shaped like a household's day."""
+    rng = random.Random(day.toordinal())
+    profile = (1, 1, 1, 1, 1, 3, 12, 18, 10, 6, 5, 5, 6, 5, 4, 4, 6, 10, 14, 12, 9, 6, 3, 2)
+    return [round(base * rng.uniform(0.5, 1.5), 1) for base in profile]
+
+
+async def _serve(opts: argparse.Namespace) -> None:
+    sim = PortalSimulator(
+        latency=opts.latency_ms / 1000,
+        session_ttl=opts.session_ttl,
+        viewstate_kb=opts.viewstate_kb,
+        accounts=opts.accounts,
+        tail_kb=opts.tail_kb,
+        compress=not opts.no_compress,
+    )
+    url = await sim.start(port=opts.port)
+    print(f"MyH2O portal simulator on {url}{USAGE_PATH}")
+    try:
+        while True:
+            await asyncio.sleep(opts.publish_every)
+            sim.publish()
+    finally:
+        await sim.stop()
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--port", type=int, default=8080)
+    args.add_argument("--latency-ms", type=float, default=0)
+    args.add_argument("--session-ttl", type=float, default=1200)
+    args.add_argument("--viewstate-kb", type=int, default=64)
+    args.add_argument("--accounts", type=int, default=1)
+    args.add_argument("--tail-kb", type=int, default=0, help="size of the scripts after the usage form")
+    args.add_argument("--no-compress", action="store_true", help="never gzip responses")
+    args.add_argument("--publish-every", type=float, default=60, help="seconds between new readings")
+    try:
+        asyncio.run(_serve(args.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,195 @@
 """Fort Worth MyH2O integration for Home Assistant."""
+import importlib
+
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_USERNAME
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, device_registry as dr, entity_registry as er
+from homeassistant.helpers.storage import Store
 
-from .const import DOMAIN
+from .client import get_http_client
+from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_DAYS,
+    ATTR_END,
+    ATTR_PERIOD,
+    ATTR_START,
+    CONF_FAILURE_THRESHOLD,
+    CONF_HISTORY_IMPORT,
+    CONF_REQUESTS_PER_MINUTE,
+    DOMAIN,
+    MAX_BACKFILL_DAYS,
+    SERVICE_BACKFILL,
+    SERVICE_QUERY_USAGE,
+    STORAGE_VERSION,
+)
 from .coordinator import FWMH2ODataUpdateCoordinator
+from .rollup import PERIODS
+
+PLATFORMS = ["sensor", "binary_sensor"]
+
+# Stores kept per config entry, as f"{DOMAIN}.{entry_id}.<name>"
+ENTRY_STORES = ("session", "data", "scheduler", "backfill", "leak", "rollups", "cost", "import_scheduler")
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+BACKFILL_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_DAYS): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_BACKFILL_DAYS)),
+    }
+)
+
+QUERY_USAGE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_PERIOD): vol.In(PERIODS),
+        vol.Optional(ATTR_START): cv.date,
+        vol.Optional(ATTR_END): cv.date,
+    }
+)
+
+
+def _history_importers(hass: HomeAssistant, call: ServiceCall) -> dict:
+    """Return the history importers a service call targets, keyed by config entry id."""
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    coordinators = {
+        key: coordinator
+        for key, coordinator in hass.data.get(DOMAIN, {}).items()
+        if isinstance(coordinator, FWMH2ODataUpdateCoordinator) and entry_id in (None, key)
+    }
+    if entry_id is not None and entry_id not in coordinators:
+        raise ServiceValidationError(f"{entry_id} is not a loaded {DOMAIN} config entry")
+    importers = {key: c.history for key, c in coordinators.items() if c.history is not None}
+    if not importers:
+        raise ServiceValidationError("History import is not enabled in the options of any selected entry")
+    return importers
+
+
+async def async_setup(hass: HomeAssistant, config: dict):
+    """Register the integration's services."""
+
+    async def handle_backfill(call: ServiceCall) -> ServiceResponse:
+        """Backfill hourly usage for one entry, or every entry with history import on."""
+        return {
+            key: await importer.async_backfill(call.data.get(ATTR_DAYS))
+            for key, importer in _history_importers(hass, call).items()
+        }
+
+    async def handle_query_usage(call: ServiceCall) -> ServiceResponse:
+        """Return usage totals per period from the rollup index, without touching the recorder."""
+        return {
+            key: await importer.async_query_usage(
+                call.data[ATTR_PERIOD], call.data.get(ATTR_START), call.data.get(ATTR_END)
+            )
+            for key, importer in _history_importers(hass, call).items()
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BACKFILL,
+        handle_backfill,
+        schema=BACKFILL_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_USAGE,
+        handle_query_usage,
+        schema=QUERY_USAGE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    return True
 
-PLATFORMS = ["sensor"]
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up Fort Worth MyH2O from a config entry."""
     hass.data.setdefault(DOMAIN, {})
 
+    # Portal protection is shared by all entries; this entry's options can tighten it
+    get_http_client(hass).set_entry_limits(
+        entry.entry_id,
+        entry.options.get(CONF_REQUESTS_PER_MINUTE),
+        entry.options.get(CONF_FAILURE_THRESHOLD),
+    )
+
     # Create coordinator
     coordinator = FWMH2ODataUpdateCoordinator(hass, entry)
 
-    # Perform initial data load
-    await coordinator.async_config_entry_first_refresh()
+    # Reuse the portal session, poll schedule and data saved by a previous run, if any.
+    # With saved data the sensors come up at once and the first poll waits until
+    # Home Assistant has started; otherwise the first poll is needed to find the accounts.
+    if await coordinator.async_restore():
+        coordinator.async_schedule_first_refresh()
+    else:
+        # Perform initial data load; close the portal session if setup is retried
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            await coordinator.async_shutdown()
+            raise
 
     # Store coordinator so platforms can access it
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
+    # The history import shares the coordinator's portal session
+    if entry.options.get(CONF_HISTORY_IMPORT, False):
+        # Loaded only when enabled, in the import executor so the event loop is not blocked
+        history = await hass.async_add_import_executor_job(importlib.import_module, f"{__name__}.history")
+        coordinator.history = history.HistoryImporter(hass, entry, coordinator.session)
+        await coordinator.history.async_start()
+
     # Forward setup to sensor platform
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    _async_remove_empty_devices(hass, entry)
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
 
     return True
 
 
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry so new options take effect."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+@callback
+def _async_remove_empty_devices(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop devices left without entities, such as the one-device-per-sensor layout of old versions."""
+    device_registry = dr.async_get(hass)
+    entity_registry = er.async_get(hass)
+    for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id):
+        if not er.async_entries_for_device(entity_registry, device.id, include_disabled_entities=True):
+            device_registry.async_update_device(device.id, remove_config_entry_id=entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        if coordinator.history is not None:
+            await coordinator.history.async_stop()
+        await coordinator.async_shutdown()
+        get_http_client(hass).set_entry_limits(entry.entry_id, None, None)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete what the entry saved, and the reading cache unless another entry uses the same login."""
+    for name in ENTRY_STORES:
+        await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.{name}").async_remove()
+
+    username = entry.data.get(CONF_USERNAME)
+    if any(
+        other.data.get(CONF_USERNAME) == username
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if other.entry_id != entry.entry_id
+    ):
+        return
+    cache = await hass.async_add_import_executor_job(importlib.import_module, f"{__name__}.cache")
+    await cache.ReadingCache(hass, username).async_remove()
@@ -0,0 +1,209 @@
+"""Fill missing days of hourly usage in resumable, bounded chunks."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Any, NamedTuple
+
+import homeassistant.util.dt as dt_util
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    BACKFILL_CHUNK_DAYS,
+    BACKFILL_CONCURRENCY,
+    DEFAULT_BACKFILL_DAYS,
+    DOMAIN,
+    MAX_BACKFILL_DAYS,
+    SIGNAL_BACKFILL_PROGRESS,
+    SIGNAL_HISTORY_IMPORTED,
+    STORAGE_VERSION,
+)
+from .cache import ReadingCache
+from .fetcher import HourlyReading, async_fetch_cumulative_readings_for_date, hours_in_day, is_complete_day
+from .cost import CostEngine
+from .leak import LeakDetector
+from .rollup import RollupIndex
+from .historical_import import ImportedStatistics, async_get_imported_statistics, async_import_hourly_statistics
+from .session import MyH2OSession
+from .throttle import CircuitOpenError
+
+_LOGGER = logging.getLogger(__name__)
+
+# A day this recent with no readings is probably not published yet, so stop there
+UNPUBLISHED_GRACE_DAYS = 2
+
+
+class BackfillResult(NamedTuple):
+    """Outcome of one backfill run.
+
+    ``stopped_at`` is the first day left for a later run, if the run ended
+    before ``end``; ``failed`` is True when that was because a fetch failed or
+    the circuit was open, rather than the day not being published yet.
+    """
+
+    rows: int
+    stopped_at: date | None = None
+    failed: bool = False
+
+
+class BackfillEngine:
+    """Work out which days are missing from the statistics and import them.
+
+    Days already in the local reading cache are imported without a request.
+
+    A day is missing when the statistic has fewer hours for it than the day
+    has, wherever it is in the window: before the first imported hour, in a
+    gap, or after the last one. Missing days are fetched BACKFILL_CHUNK_DAYS
+    at a time with at most BACKFILL_CONCURRENCY requests in flight and
+    imported in date order with one recorder call per chunk. A day the portal
+    had no or only some hours for, once it is UNPUBLISHED_GRACE_DAYS old, is
+    remembered as settled and not fetched again. Progress is published on
+    SIGNAL_BACKFILL_PROGRESS for the Backfill Progress sensor, and a run that
+    wrote rows is announced on SIGNAL_HISTORY_IMPORTED.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        statistic_id: str,
+        session: MyH2OSession,
+        cache: ReadingCache,
+        detector: LeakDetector | None = None,
+        rollups: RollupIndex | None = None,
+        cost: CostEngine | None = None,
+    ) -> None:
+        self.hass = hass
+        self.entry_id = entry_id
+        self.statistic_id = statistic_id
+        self.session = session
+        self.cache = cache
+        self.detector = detector
+        self.rollups = rollups
+        self.cost = cost
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.backfill")
+        self._lock = asyncio.Lock()
+        self.progress: dict[str, Any] = {"running": False, "total_days": 0, "completed_days": 0, "rows_imported": 0}
+        # Outcome of the last run that wrote rows: when it finished, the newest hour and the row count
+        self.last_import: dict[str, Any] = {}
+        # Days the portal will not fill in further, as ISO dates
+        self._settled: set[str] = set()
+
+    async def async_load(self) -> None:
+        """Restore the settled days and the outcome of the last import."""
+        stored = await self._store.async_load() or {}
+        self._settled = set(stored.get("settled_days", []))
+        self.last_import = stored.get("last_import", {})
+
+    async def _async_save(self) -> None:
+        # Days older than any backfill can reach are forgotten
+        oldest = (dt_util.now().date() - timedelta(days=MAX_BACKFILL_DAYS)).isoformat()
+        self._settled = {day for day in self._settled if day >= oldest}
+        await self._store.async_save({"settled_days": sorted(self._settled), "last_import": self.last_import})
+
+    async def async_missing_dates(self, end: date, days: int) -> tuple[list[date], ImportedStatistics]:
+        """Return the days up to ``end`` (at most ``days`` back) that still need importing."""
+        imported = await async_get_imported_statistics(self.hass, self.statistic_id)
+        first = end - timedelta(days=days - 1)
+        missing = []
+        for day in (first + timedelta(days=i) for i in range(days)):
+            if day.isoformat() in self._settled:
+                continue
+            start = dt_util.start_of_local_day(day).timestamp()
+            next_start = dt_util.start_of_local_day(day + timedelta(days=1)).timestamp()
+            if imported.count_between(start, next_start) < hours_in_day(day):
+                missing.append(day)
+        return missing, imported
+
+    def _publish(self, **changes: Any) -> None:
+        self.progress.update(changes)
+        async_dispatcher_send(self.hass, SIGNAL_BACKFILL_PROGRESS.format(self.entry_id), dict(self.progress))
+
+    async def _async_fetch(self, semaphore: asyncio.Semaphore, day: date) -> list[HourlyReading] | None:
+        async with semaphore:
+            try:
+                return await async_fetch_cumulative_readings_for_date(self.session, day, self.cache)
+            except CircuitOpenError as err:
+                _LOGGER.warning("not fetching %s: %s", day.isoformat(), err)
+                return None
+            except Exception:
+                _LOGGER.exception("fetching %s failed", day.isoformat())
+                return None
+
+    async def async_run(self, days: int = DEFAULT_BACKFILL_DAYS, end: date | None = None) -> BackfillResult:
+        """Import every missing day up to ``end`` (default yesterday) and report how far it got.
+
+        Overlapping calls are serialized, and the second one only sees what the
+        first left missing.
+        """
+        async with self._lock:
+            if end is None:
+                end = dt_util.now().date() - timedelta(days=1)
+            dates, imported = await self.async_missing_dates(end, days)
+            if not dates:
+                _LOGGER.debug("nothing to backfill up to %s", end.isoformat())
+                return BackfillResult(0)
+
+            _LOGGER.info("backfilling %d day(s) from %s", len(dates), dates[0].isoformat())
+            self._publish(running=True, total_days=len(dates), completed_days=0, rows_imported=0)
+            semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+            total_rows = 0
+            stopped_at: date | None = None
+            failed = False
+            try:
+                for offset in range(0, len(dates), BACKFILL_CHUNK_DAYS):
+                    chunk = dates[offset: offset + BACKFILL_CHUNK_DAYS]
+                    results = await asyncio.gather(*(self._async_fetch(semaphore, day) for day in chunk))
+
+                    # Import in date order up to the first day that failed or is not published yet
+                    completed: list[list[HourlyReading]] = []
+                    for day, readings in zip(chunk, results):
+                        if readings is None or (not readings and (end - day).days < UNPUBLISHED_GRACE_DAYS):
+                            break
+                        completed.append(readings)
+
+                    rows = await async_import_hourly_statistics(
+                        self.hass, self.statistic_id, completed, imported, self.detector, self.rollups, self.cost
+                    )
+                    total_rows += rows
+                    if completed:
+                        last_completed = chunk[len(completed) - 1]
+                        settled = len(self._settled)
+                        for day, readings in zip(chunk, completed):
+                            if (end - day).days >= UNPUBLISHED_GRACE_DAYS and not is_complete_day(day, readings):
+                                self._settled.add(day.isoformat())
+                        if len(self._settled) != settled:
+                            await self._async_save()
+                        self._publish(
+                            completed_days=self.progress["completed_days"] + len(completed),
+                            rows_imported=total_rows,
+                            last_completed=last_completed.isoformat(),
+                        )
+                        _LOGGER.info(
+                            "backfill %d/%d days done (through %s)",
+                            self.progress["completed_days"], len(dates), last_completed.isoformat(),
+                        )
+                    if len(completed) < len(chunk):
+                        stopped_at = chunk[len(completed)]
+                        failed = results[len(completed)] is None
+                        _LOGGER.warning(
+                            "backfill stopped at %s (%s)",
+                            stopped_at.isoformat(), "fetch failed" if failed else "not published yet",
+                        )
+                        break
+            finally:
+                self._publish(running=False)
+            if total_rows:
+                self.last_import = {
+                    "finished": dt_util.utcnow().isoformat(),
+                    "last_hour": (
+                        dt_util.utc_from_timestamp(imported.last_start).isoformat() if imported.last_start else None
+                    ),
+                    "rows": total_rows,
+                }
+                await self._async_save()
+                async_dispatcher_send(self.hass, SIGNAL_HISTORY_IMPORTED.format(self.entry_id))
+            return BackfillResult(total_rows, stopped_at, failed)
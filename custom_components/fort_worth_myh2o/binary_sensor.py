@@ -0,0 +1,66 @@
+"""Leak binary sensors, updated as hourly usage is imported."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntity
+from homeassistant.const import CONF_USERNAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import DOMAIN, PRIMARY_ACCOUNT, SIGNAL_LEAK_UPDATE
+from .entity import account_device_info
+from .leak import LeakDetector
+
+LEAK_SENSORS = (
+    ("continuous_flow", "Continuous Flow"),
+    ("spike", "Usage Spike"),
+)
+
+
+async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
+    """Set up the leak binary sensors when history import is enabled."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    if coordinator.history is None:
+        return
+    unique_base = f"{entry.entry_id}_{entry.data.get(CONF_USERNAME)}"
+    async_add_entities(
+        LeakSensor(coordinator.history.detector, unique_base, kind, name) for kind, name in LEAK_SENSORS
+    )
+
+
+class LeakSensor(BinarySensorEntity):
+    """On while the detector flags ``kind``.
+
+    Continuous flow is for the latest imported hour; a spike counts for 24
+    hours after its hour, which the ``spike_hour`` attribute gives.
+    """
+
+    _attr_should_poll = False
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+
+    def __init__(self, detector: LeakDetector, unique_base: str, kind: str, name: str) -> None:
+        self._detector = detector
+        self._kind = kind
+        self._attr_name = name
+        self._attr_unique_id = f"{unique_base}_{kind}"
+        self._attr_device_info = account_device_info(unique_base, PRIMARY_ACCOUNT)
+
+    @property
+    def is_on(self) -> bool:
+        return getattr(self._detector, self._kind)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return self._detector.attributes
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_LEAK_UPDATE.format(self._detector.entry_id), self._handle_update
+            )
+        )
+
+    @callback
+    def _handle_update(self) -> None:
+        self.async_write_ha_state()
@@ -0,0 +1,157 @@
+"""On-disk cache of hourly readings in fixed-width, append-only records."""
+from __future__ import annotations
+
+import asyncio
+from array import array
+from datetime import date
+import logging
+import os
+import sys
+
+import homeassistant.util.dt as dt_util
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+from .fetcher import HourlyReading, hours_in_day, is_complete_day
+
+_LOGGER = logging.getLogger(__name__)
+
+# Each record is four little-endian doubles: day ordinal, epoch seconds, cumulative, usage
+FIELDS = 4
+RECORD_SIZE = FIELDS * array("d").itemsize
+# Rewrite the file once superseded records outnumber live ones
+COMPACT_RATIO = 2
+
+
+class ReadingCache:
+    """Hourly readings for one portal login, indexed by day.
+
+    The whole file is loaded into an ``array('d')`` at startup and indexed by
+    day ordinal. New days are appended; if a day is stored again, the newer
+    block wins and the file is compacted once stale records dominate. Disk I/O
+    runs in the executor.
+    """
+
+    def __init__(self, hass: HomeAssistant, username: str | None) -> None:
+        self.hass = hass
+        self.path = hass.config.path(STORAGE_DIR, DOMAIN, f"{slugify(username or 'default')}.bin")
+        self._records = array("d")
+        # day ordinal -> (first record, record count)
+        self._index: dict[int, tuple[int, int]] = {}
+        self._lock = asyncio.Lock()
+
+    def _read(self) -> array:
+        records = array("d")
+        try:
+            with open(self.path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return records
+        # Drop a torn trailing record left by an interrupted write
+        records.frombytes(data[: len(data) - len(data) % RECORD_SIZE])
+        if sys.byteorder != "little":
+            records.byteswap()
+        return records
+
+    def _build_index(self) -> None:
+        self._index = {}
+        records = self._records
+        start = 0
+        total = len(records) // FIELDS
+        while start < total:
+            day = records[start * FIELDS]
+            end = start + 1
+            # A block ends when the day changes or time stops increasing (the day was stored again)
+            while (
+                end < total
+                and records[end * FIELDS] == day
+                and records[end * FIELDS + 1] > records[(end - 1) * FIELDS + 1]
+            ):
+                end += 1
+            # An incomplete day is left out so it is fetched again
+            if end - start >= hours_in_day(date.fromordinal(int(day))):
+                self._index[int(day)] = (start, end - start)
+            start = end
+
+    async def async_load(self) -> None:
+        """Load the cache file and index it by day."""
+        self._records = await self.hass.async_add_executor_job(self._read)
+        self._build_index()
+        _LOGGER.debug("Loaded %d cached days from %s", len(self._index), self.path)
+
+    def __contains__(self, day: date) -> bool:
+        return day.toordinal() in self._index
+
+    def get_day(self, day: date) -> list[HourlyReading] | None:
+        """Return the cached readings for ``day``, or None if it is not cached."""
+        if (span := self._index.get(day.toordinal())) is None:
+            return None
+        first, count = span
+        chunk = self._records[first * FIELDS: (first + count) * FIELDS]
+        return [
+            HourlyReading(dt_util.as_local(dt_util.utc_from_timestamp(chunk[i + 1])), chunk[i + 2], chunk[i + 3])
+            for i in range(0, len(chunk), FIELDS)
+        ]
+
+    def _write(self, block: array, rewrite: bool) -> None:
+        if sys.byteorder != "little":
+            block = array("d", block)
+            block.byteswap()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if rewrite:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(block.tobytes())
+            os.replace(tmp_path, self.path)
+        else:
+            with open(self.path, "ab") as file:
+                file.write(block.tobytes())
+
+    def _remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    async def async_remove(self) -> None:
+        """Delete the cache file and forget every cached day."""
+        async with self._lock:
+            self._records = array("d")
+            self._index = {}
+            await self.hass.async_add_executor_job(self._remove)
+
+    async def async_put_day(self, day: date, readings: list[HourlyReading]) -> bool:
+        """Append a complete day of readings; return False if the day is incomplete."""
+        if not is_complete_day(day, readings):
+            return False
+        # One record per hour, so the block's times strictly increase as _build_index expects
+        by_epoch = {reading.timestamp.timestamp(): reading for reading in readings}
+        readings = [by_epoch[epoch] for epoch in sorted(by_epoch)]
+        ordinal = day.toordinal()
+        block = array("d")
+        for reading in readings:
+            block.extend((ordinal, reading.timestamp.timestamp(), reading.cumulative, reading.usage))
+
+        async with self._lock:
+            first = len(self._records) // FIELDS
+            self._records.extend(block)
+            self._index[ordinal] = (first, len(readings))
+            live = sum(count for _, count in self._index.values())
+            if first + len(readings) > COMPACT_RATIO * live:
+                await self._async_compact()
+            else:
+                await self.hass.async_add_executor_job(self._write, block, False)
+        return True
+
+    async def _async_compact(self) -> None:
+        """Rewrite the file with only the newest block of each day, in day order."""
+        records = array("d")
+        index = {}
+        for ordinal in sorted(self._index):
+            first, count = self._index[ordinal]
+            index[ordinal] = (len(records) // FIELDS, count)
+            records.extend(self._records[first * FIELDS: (first + count) * FIELDS])
+        self._records, self._index = records, index
+        await self.hass.async_add_executor_job(self._write, records, True)
@@ -0,0 +1,229 @@
+"""HTTP client shared by every MyH2O config entry."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+import re
+from typing import NamedTuple
+import zlib
+
+from aiohttp import ClientConnectionError, ClientResponse, ClientSession, ClientTimeout, CookieJar, hdrs
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .const import (
+    BREAKER_MAX_RESET_TIMEOUT,
+    BREAKER_RESET_TIMEOUT,
+    CONNECT_TIMEOUT,
+    DATA_HTTP_CLIENT,
+    DEFAULT_FAILURE_THRESHOLD,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DOMAIN,
+    MAX_CONNECTIONS_PER_HOST,
+    RATE_LIMIT_BURST,
+    REQUEST_TIMEOUT,
+)
+from .throttle import CircuitBreaker, TokenBucket
+
+try:
+    import brotli
+except ImportError:  # optional; aiohttp uses the same package for br
+    brotli = None
+
+# Statuses that mean the portal is down or throttling, as opposed to a bad request
+FAILURE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+# Only ask for encodings we can decode ourselves, since the sessions do not auto-decompress
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+READ_CHUNK_SIZE = 64 * 1024
+# Stop markers are searched again this far back so one split across chunks is still found
+MARKER_OVERLAP = 256
+# With less than this left to download, finish reading so the connection can be reused
+EARLY_STOP_MIN_BYTES = 16 * 1024
+
+
+class ResponseTooLargeError(Exception):
+    """The portal sent more than the body size limit."""
+
+
+class Body(NamedTuple):
+    """A response body: the decoded bytes, bytes on the wire and whether the download stopped early."""
+
+    data: bytearray
+    wire_bytes: int
+    stopped_early: bool
+
+
+class _BrotliDecompressor:
+    """The zlib decompressor interface over brotli."""
+
+    def __init__(self) -> None:
+        self._decompressor = brotli.Decompressor()
+
+    def decompress(self, data: bytes, _max_length: int) -> bytes:
+        return self._decompressor.process(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def _decompressor(encoding: str):
+    """Return a decompressor for a Content-Encoding, or None for an uncompressed body."""
+    if encoding in ("gzip", "x-gzip", "deflate"):
+        # 32 + MAX_WBITS accepts both gzip and zlib headers
+        return zlib.decompressobj(32 + zlib.MAX_WBITS)
+    if encoding == "br" and brotli is not None:
+        return _BrotliDecompressor()
+    if encoding in ("", "identity"):
+        return None
+    raise ValueError(f"Unsupported Content-Encoding {encoding!r}")
+
+
+async def async_read_body(
+    resp: ClientResponse, max_bytes: int, stop_after: tuple[re.Pattern[bytes], ...] = ()
+) -> Body:
+    """Stream and decode a response body of at most ``max_bytes``.
+
+    With ``stop_after``, reading stops at the first match of its last pattern
+    that follows matches of all the others, and the body ends there. Raises
+    ResponseTooLargeError past ``max_bytes`` of decoded data, which also
+    guards against compression bombs.
+    """
+    decompressor = _decompressor(resp.headers.get(hdrs.CONTENT_ENCODING, "").strip().lower())
+    pending = list(stop_after[:-1])
+    end = stop_after[-1] if stop_after else None
+    after = 0
+    buffer = bytearray()
+    wire_bytes = 0
+    async for chunk in resp.content.iter_chunked(READ_CHUNK_SIZE):
+        wire_bytes += len(chunk)
+        scan_from = max(0, len(buffer) - MARKER_OVERLAP)
+        if decompressor is not None:
+            # Asking for one byte more than allowed tells a full body from an oversized one
+            chunk = decompressor.decompress(chunk, max_bytes - len(buffer) + 1)
+        buffer += chunk
+        if len(buffer) > max_bytes:
+            raise ResponseTooLargeError(f"Response from {resp.url.path} is larger than {max_bytes} bytes")
+        if end is None:
+            continue
+        for pattern in list(pending):
+            if match := pattern.search(buffer, scan_from):
+                pending.remove(pattern)
+                after = max(after, match.end())
+        if pending or not (match := end.search(buffer, max(after, scan_from))):
+            continue
+        del buffer[match.end():]
+        remaining = (resp.content_length or 0) - wire_bytes
+        # Once the whole body has arrived, aiohttp has already handed the connection
+        # back to the pool, possibly with reading paused until the buffer is consumed
+        if not resp.content.is_eof() and (resp.content_length is None or remaining >= EARLY_STOP_MIN_BYTES):
+            # The unread rest is still on the connection, so it must not go back to the pool
+            resp.close()
+            return Body(buffer, wire_bytes, True)
+        # Drain the rest so the keep-alive connection can be reused
+        async for chunk in resp.content.iter_chunked(READ_CHUNK_SIZE):
+            wire_bytes += len(chunk)
+        return Body(buffer, wire_bytes, False)
+    if decompressor is not None:
+        buffer += decompressor.flush()
+    return Body(buffer, wire_bytes, False)
+
+
+def _retry_after(resp: ClientResponse) -> float | None:
+    value = resp.headers.get(hdrs.RETRY_AFTER, "")
+    return float(value) if value.isdigit() else None
+
+
+class MyH2OHttpClient:
+    """Pooled access to the portal for all accounts.
+
+    Every account gets its own ClientSession so cookies stay separate, but the
+    sessions are built with ``async_create_clientsession`` and therefore share
+    Home Assistant's keep-alive connector and DNS cache. A per-host semaphore
+    caps how many connections we hold open to the portal at any time.
+
+    Every request, from polls and history imports alike, also passes one
+    shared token bucket and circuit breaker, so a slow or failing portal sees
+    a bounded request rate and no login storms from several accounts.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.timeout = ClientTimeout(total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+        self._host_limit = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+        self.limiter = TokenBucket(DEFAULT_REQUESTS_PER_MINUTE / 60, RATE_LIMIT_BURST)
+        self.breaker = CircuitBreaker(DEFAULT_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT, BREAKER_MAX_RESET_TIMEOUT)
+        # entry_id -> (requests per minute, failure threshold); the strictest entry wins
+        self._entry_limits: dict[str, tuple[int, int]] = {}
+
+    def set_entry_limits(self, entry_id: str, requests_per_minute: int | None, failure_threshold: int | None) -> None:
+        """Apply an entry's configured limits, or drop them when both are None."""
+        if requests_per_minute is None and failure_threshold is None:
+            self._entry_limits.pop(entry_id, None)
+        else:
+            self._entry_limits[entry_id] = (
+                requests_per_minute or DEFAULT_REQUESTS_PER_MINUTE,
+                failure_threshold or DEFAULT_FAILURE_THRESHOLD,
+            )
+        limits = self._entry_limits.values()
+        rate = min((rpm for rpm, _ in limits), default=DEFAULT_REQUESTS_PER_MINUTE)
+        self.limiter.configure(rate / 60, RATE_LIMIT_BURST)
+        self.breaker.threshold = min((threshold for _, threshold in limits), default=DEFAULT_FAILURE_THRESHOLD)
+
+    def create_session(self, cookie_jar: CookieJar) -> ClientSession:
+        """Return a session on the shared connector with its own cookie jar.
+
+        The caller owns the session and must detach it on unload.
+        """
+        return async_create_clientsession(
+            self.hass,
+            auto_cleanup=False,
+            cookie_jar=cookie_jar,
+            timeout=self.timeout,
+            # Bodies are decompressed while streaming by async_read_body, which can stop early
+            auto_decompress=False,
+        )
+
+    @asynccontextmanager
+    async def request(self, session: ClientSession, method: str, url: str, **kwargs) -> AsyncIterator[ClientResponse]:
+        """Issue a request while holding one of the per-host connection slots.
+
+        Raises CircuitOpenError without sending anything while the portal is
+        considered down.
+        """
+        self.breaker.before_request()
+        settled = False
+        try:
+            await self.limiter.async_acquire()
+            headers = {hdrs.ACCEPT_ENCODING: ACCEPT_ENCODING, **kwargs.pop("headers", {})}
+            async with self._host_limit:
+                async with session.request(method, url, headers=headers, **kwargs) as resp:
+                    if resp.status in FAILURE_STATUSES:
+                        self.breaker.record_failure(_retry_after(resp))
+                    else:
+                        self.breaker.record_success()
+                    settled = True
+                    yield resp
+        except (ClientConnectionError, asyncio.TimeoutError):
+            if not settled:
+                settled = True
+                self.breaker.record_failure()
+            raise
+        finally:
+            if not settled:
+                self.breaker.release_probe()
+
+    def as_dict(self) -> dict:
+        """Limiter and breaker state for diagnostics."""
+        return {"rate_limiter": self.limiter.as_dict(), "circuit_breaker": self.breaker.as_dict()}
+
+
+def get_http_client(hass: HomeAssistant) -> MyH2OHttpClient:
+    """Return the client shared by all config entries, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_HTTP_CLIENT not in domain_data:
+        domain_data[DATA_HTTP_CLIENT] = MyH2OHttpClient(hass)
+    return domain_data[DATA_HTTP_CLIENT]
@@ -9,7 +9,27 @@ from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.const import CONF_USERNAME, CONF_PASSWORD
 
-from .const import DOMAIN, CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
+from .const import (
+    DOMAIN,
+    CONF_BACKFILL_DAYS,
+    CONF_BILLING_CYCLE_DAY,
+    CONF_FAILURE_THRESHOLD,
+    CONF_FIXED_CHARGES,
+    CONF_HISTORY_IMPORT,
+    CONF_IMPORT_TIME,
+    CONF_REQUESTS_PER_MINUTE,
+    CONF_SCAN_INTERVAL,
+    CONF_SEWER_RATES,
+    CONF_WATER_RATES,
+    DEFAULT_BACKFILL_DAYS,
+    DEFAULT_BILLING_CYCLE_DAY,
+    DEFAULT_FAILURE_THRESHOLD,
+    DEFAULT_IMPORT_TIME,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_SCAN_INTERVAL,
+    MAX_BACKFILL_DAYS,
+)
+from .cost import parse_tiers
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {vol.Required(CONF_USERNAME): str, vol.Required(CONF_PASSWORD): str, vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): int}
@@ -19,6 +39,11 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
 class FortWorthMyH2OFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return FortWorthMyH2OOptionsFlowHandler(config_entry)
+
     async def async_step_user(self, user_input=None):
         if user_input is None:
             return self.async_show_form(step_id="user", data_schema=STEP_USER_DATA_SCHEMA)
@@ -31,3 +56,72 @@ class FortWorthMyH2OFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         options = {CONF_SCAN_INTERVAL: user_input.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)}
 
         return self.async_create_entry(title=user_input[CONF_USERNAME], data=data, options=options)
+
+
+def _valid_import_time(value) -> str:
+    """Accept a 24-hour ``HH:MM`` time."""
+    try:
+        hour, minute = map(int, str(value).split(":"))
+    except ValueError as err:
+        raise vol.Invalid("invalid_import_time") from err
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise vol.Invalid("invalid_import_time")
+    return f"{hour:02d}:{minute:02d}"
+
+
+class FortWorthMyH2OOptionsFlowHandler(config_entries.OptionsFlow):
+    """Polling, portal protection, history import and billing settings."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        # Kept under our own name: only newer Home Assistant sets config_entry itself
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        errors = {}
+        if user_input is not None:
+            try:
+                user_input[CONF_IMPORT_TIME] = _valid_import_time(user_input[CONF_IMPORT_TIME])
+            except vol.Invalid:
+                errors[CONF_IMPORT_TIME] = "invalid_import_time"
+            for key in (CONF_WATER_RATES, CONF_SEWER_RATES):
+                try:
+                    parse_tiers(user_input.get(key, ""))
+                except ValueError:
+                    errors[key] = "invalid_rates"
+            if not errors:
+                return self.async_create_entry(data=user_input)
+
+        options = self._entry.options
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_SCAN_INTERVAL, default=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+                ): vol.All(int, vol.Range(min=300)),
+                vol.Optional(
+                    CONF_REQUESTS_PER_MINUTE,
+                    default=options.get(CONF_REQUESTS_PER_MINUTE, DEFAULT_REQUESTS_PER_MINUTE),
+                ): vol.All(int, vol.Range(min=1, max=DEFAULT_REQUESTS_PER_MINUTE)),
+                vol.Optional(
+                    CONF_FAILURE_THRESHOLD,
+                    default=options.get(CONF_FAILURE_THRESHOLD, DEFAULT_FAILURE_THRESHOLD),
+                ): vol.All(int, vol.Range(min=1, max=20)),
+                vol.Optional(
+                    CONF_HISTORY_IMPORT, default=options.get(CONF_HISTORY_IMPORT, False)
+                ): bool,
+                vol.Optional(
+                    CONF_IMPORT_TIME, default=options.get(CONF_IMPORT_TIME, DEFAULT_IMPORT_TIME)
+                ): str,
+                vol.Optional(
+                    CONF_BACKFILL_DAYS, default=options.get(CONF_BACKFILL_DAYS, DEFAULT_BACKFILL_DAYS)
+                ): vol.All(int, vol.Range(min=1, max=MAX_BACKFILL_DAYS)),
+                vol.Optional(
+                    CONF_BILLING_CYCLE_DAY, default=options.get(CONF_BILLING_CYCLE_DAY, DEFAULT_BILLING_CYCLE_DAY)
+                ): vol.All(int, vol.Range(min=1, max=28)),
+                vol.Optional(CONF_WATER_RATES, default=options.get(CONF_WATER_RATES, "")): str,
+                vol.Optional(CONF_SEWER_RATES, default=options.get(CONF_SEWER_RATES, "")): str,
+                vol.Optional(
+                    CONF_FIXED_CHARGES, default=options.get(CONF_FIXED_CHARGES, 0.0)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
@@ -4,3 +4,83 @@ Constants for the integration
 DOMAIN = "fort_worth_myh2o"
 DEFAULT_SCAN_INTERVAL = 3600  # seconds
 CONF_SCAN_INTERVAL = "scan_interval"
+
+PORTAL_HOST = "fwmyh2o.smartcmobile.com"
+LOGIN_URL = f"https://{PORTAL_HOST}/portal/login.aspx"
+USAGE_URL = f"https://{PORTAL_HOST}/portal/usages.aspx?type=WU"
+
+STORAGE_VERSION = 1
+# The last good data is saved this long after it changes; a restart shows it before the first poll
+DATA_SAVE_DELAY = 60  # seconds
+
+# Parsing runs in the executor; limit how many pages are parsed at once
+DATA_PARSE_SEMAPHORE = "parse_semaphore"
+PARSE_CONCURRENCY = 2
+
+# Shared HTTP client
+DATA_HTTP_CLIENT = "http_client"
+MAX_CONNECTIONS_PER_HOST = 4
+REQUEST_TIMEOUT = 30  # seconds
+# Largest decoded response body accepted from the portal
+MAX_BODY_BYTES = 8 * 1024 * 1024
+CONNECT_TIMEOUT = 10  # seconds
+
+# Portal protection shared by all entries; the options can only make the limits stricter
+CONF_REQUESTS_PER_MINUTE = "requests_per_minute"
+CONF_FAILURE_THRESHOLD = "failure_threshold"
+DEFAULT_REQUESTS_PER_MINUTE = 20
+DEFAULT_FAILURE_THRESHOLD = 5
+RATE_LIMIT_BURST = 5
+BREAKER_RESET_TIMEOUT = 60  # seconds before the first probe
+BREAKER_MAX_RESET_TIMEOUT = 1800  # seconds
+
+# Accounts behind one login; PRIMARY_ACCOUNT is used when the portal has no account selector
+PRIMARY_ACCOUNT = "primary"
+ACCOUNT_FETCH_CONCURRENCY = 2
+
+# Page method behind the usage chart; returns hourly interval data as JSON
+HOURLY_USAGE_URL = f"https://{PORTAL_HOST}/portal/Usages.aspx/LoadWaterUsage"
+
+# Sent after every poll so diagnostic sensors refresh even when the data did not change
+SIGNAL_METRICS_UPDATED = f"{DOMAIN}_metrics_updated_{{}}"
+
+# Polls in a row that must return the same low-confidence reading before it is published
+REJECTION_CONFIRMATIONS = 3
+
+# History import: hourly usage into long-term statistics, with leak detection
+CONF_HISTORY_IMPORT = "history_import"
+CONF_IMPORT_TIME = "import_time"
+CONF_BACKFILL_DAYS = "backfill_days"
+DEFAULT_IMPORT_TIME = "03:00"
+# How far back the daily run fills gaps, and the most a backfill service call may request
+DEFAULT_BACKFILL_DAYS = 30
+MAX_BACKFILL_DAYS = 730
+# Days fetched concurrently per chunk; each chunk is imported with one recorder call
+BACKFILL_CHUNK_DAYS = 7
+BACKFILL_CONCURRENCY = 3
+# Retry a failed scheduled import after this many seconds
+IMPORT_RETRY_DELAY = 3600
+# Wait this long after Home Assistant has started before catching up on a missed import
+IMPORT_CATCH_UP_DELAY = 300
+
+SERVICE_BACKFILL = "backfill"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_DAYS = "days"
+
+# Usage rollups built from the imported hours
+CONF_BILLING_CYCLE_DAY = "billing_cycle_day"
+DEFAULT_BILLING_CYCLE_DAY = 1
+SERVICE_QUERY_USAGE = "query_usage"
+
+# Bill estimate: tiers are "up-to-gallons:price per 1,000 gallons" pairs, e.g. "2000:3.12, 10000:4.50, 5.80"
+CONF_WATER_RATES = "water_rates"
+CONF_SEWER_RATES = "sewer_rates"
+CONF_FIXED_CHARGES = "fixed_charges"
+ATTR_PERIOD = "period"
+ATTR_START = "start"
+ATTR_END = "end"
+# Formatted with the config entry id
+SIGNAL_BACKFILL_PROGRESS = f"{DOMAIN}_backfill_progress_{{}}"
+SIGNAL_LEAK_UPDATE = f"{DOMAIN}_leak_update_{{}}"
+SIGNAL_HISTORY_IMPORTED = f"{DOMAIN}_history_imported_{{}}"
+EVENT_LEAK_DETECTED = f"{DOMAIN}_leak_detected"
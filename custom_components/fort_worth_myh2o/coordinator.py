@@ -1,24 +1,38 @@
 """Coordinator that logs in and fetches usage data from the Fort Worth MyH2O portal."""
 from __future__ import annotations
 
+import asyncio
 import logging
 from datetime import timedelta
-import re
+import time
 
-from aiohttp import ClientSession
-from bs4 import BeautifulSoup
-
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DEFAULT_SCAN_INTERVAL, CONF_SCAN_INTERVAL
+from .const import (
+    CONF_SCAN_INTERVAL,
+    DATA_SAVE_DELAY,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    PRIMARY_ACCOUNT,
+    REJECTION_CONFIRMATIONS,
+    SIGNAL_METRICS_UPDATED,
+    STORAGE_VERSION,
+)
+from .executor import async_run_parser
+from .metrics import PHASE_PARSE, PollMetrics
+from .parser import MIN_CONFIDENCE, UsageExtraction, parse_service_selector, parse_usage_if_changed, score_usage
+from .scheduler import AdaptivePollScheduler
+from .session import MyH2OSession
+from .throttle import CircuitOpenError
 
 _LOGGER = logging.getLogger(__name__)
 
-LOGIN_URL = "https://fwmyh2o.smartcmobile.com/portal/login.aspx"
-USAGE_URL = "https://fwmyh2o.smartcmobile.com/portal/usages.aspx?type=WU"
-
 
 class FWMH2ODataUpdateCoordinator(DataUpdateCoordinator):
     """Coordinator for fetching Fort Worth MyH2O usage data."""
@@ -28,108 +42,199 @@ class FWMH2ODataUpdateCoordinator(DataUpdateCoordinator):
         self.entry = entry
         self.username = entry.data["username"]
         self.password = entry.data["password"]
-        self.session: ClientSession | None = None
+        self.metrics = PollMetrics()
+        self.session = MyH2OSession(hass, entry.entry_id, self.username, self.password, self.metrics)
+        self.last_parse_seconds: float | None = None
+        # Change detection: page fingerprint per account and how much work it saved
+        self._fingerprints: dict[str, str] = {}
+        self.unchanged_polls = 0
+        self.skipped_parses = 0
+        # Confidence of the last parse per account, and low-confidence readings seen in a row
+        self.parse_confidence: dict[str, float] = {}
+        self._rejections: dict[str, tuple[float | None, int]] = {}
+        # History import subsystem, set up by the entry when enabled in the options
+        self.history = None
+        # Last good payload, so a restart can show it before the first poll
+        self._data_store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.data")
+        self.restored_from: str | None = None
 
         scan_interval = entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+        # The configured scan interval is the longest the scheduler will wait, unless the portal asks for longer
+        self.scheduler = AdaptivePollScheduler(hass, entry.entry_id, scan_interval)
 
         super().__init__(
             hass,
             _LOGGER,
             name="Fort Worth MyH2O",
             update_interval=timedelta(seconds=scan_interval),
+            # Unchanged data must not trigger state writes (and recorder rows)
+            always_update=False,
         )
 
-    async def _create_session(self) -> ClientSession:
-        if self.session and not self.session.closed:
-            return self.session
-        self.session = ClientSession()
-        return self.session
-
-    async def _async_get(self, url: str, **kwargs) -> str:
-        session = await self._create_session()
-        async with session.get(url, **kwargs) as resp:
-            resp.raise_for_status()
-            return await resp.text()
-
-    async def _async_post(self, url: str, **kwargs) -> str:
-        session = await self._create_session()
-        async with session.post(url, **kwargs) as resp:
-            resp.raise_for_status()
-            return await resp.text()
-
-    async def _async_login(self) -> None:
-        """Attempt to login to the portal."""
+    async def _async_parse_usage(self, account: str, html: str) -> dict:
+        """Parse an account's usage HTML in the executor unless the page is unchanged."""
+        previous = self.data.get(account) if self.data else None
+        (fingerprint, extraction), self.last_parse_seconds = await async_run_parser(
+            self.hass, parse_usage_if_changed, html, self._fingerprints.get(account) if previous else None
+        )
+        self.metrics.observe(PHASE_PARSE, self.last_parse_seconds)
+        if extraction is None:
+            self.skipped_parses += 1
+            _LOGGER.debug("Usage page for %s unchanged, skipped parsing", account)
+            return previous
+        _LOGGER.debug("Parsed %d bytes of usage HTML in %.1f ms", len(html), self.last_parse_seconds * 1000)
+        if extraction.fallbacks:
+            self.metrics.record_fallbacks(extraction.fallbacks)
+            _LOGGER.debug("Parser fallbacks used for %s: %s", account, ", ".join(extraction.fallbacks))
+
+        if not self._accept(account, extraction, previous):
+            # Without a previous good parse, publish what was found minus the doubtful reading
+            return previous or {**extraction.data, "current_reading": None}
+        self._fingerprints[account] = fingerprint
+        return extraction.data
+
+    def _accept(self, account: str, extraction: UsageExtraction, previous: dict | None) -> bool:
+        """Decide whether a parse is trustworthy enough to publish.
+
+        A low-confidence parse is rejected, and its page is parsed again on
+        the next poll. A reading from a weak label is never published. A
+        reading that fails the plausibility checks (backwards, or an
+        implausible jump) is accepted only once the same value has been
+        rejected on REJECTION_CONFIRMATIONS polls in a row, so a replaced meter
+        is not locked out.
+        """
+        score, problems = score_usage(extraction, previous)
+        self.parse_confidence[account] = score
+        reading = extraction.data["current_reading"]
+        if score >= MIN_CONFIDENCE:
+            self._rejections.pop(account, None)
+            if problems:
+                _LOGGER.debug("Usage for %s accepted with confidence %.2f: %s", account, score, "; ".join(problems))
+            return True
+
+        if reading is not None and extraction.confidence["current_reading"] >= MIN_CONFIDENCE:
+            pending, count = self._rejections.get(account, (reading, 0))
+            count = count + 1 if pending == reading else 1
+            if count >= REJECTION_CONFIRMATIONS:
+                _LOGGER.warning(
+                    "Accepting usage for %s after %d consistent polls despite: %s",
+                    account, count, "; ".join(problems),
+                )
+                self._rejections.pop(account, None)
+                return True
+            self._rejections[account] = (reading, count)
+        else:
+            self._rejections.pop(account, None)
+        self.metrics.rejected_parses += 1
+        _LOGGER.warning(
+            "Rejected usage for %s with confidence %.2f (%s); keeping the last good data",
+            account, score, "; ".join(problems),
+        )
+        return False
+
+    async def async_restore(self) -> bool:
+        """Load the saved portal session, learned poll schedule and last good data.
+
+        Returns True if data was restored, so the first poll can wait.
+        """
+        await self.session.async_load()
+        await self.scheduler.async_load()
+        stored = await self._data_store.async_load()
+        if not stored or not stored.get("data"):
+            return False
+        self.data = stored["data"]
+        self.restored_from = stored.get("saved")
+        _LOGGER.debug("Restored MyH2O data for %s saved at %s", self.username, self.restored_from)
+        return True
+
+    @callback
+    def async_schedule_first_refresh(self) -> None:
+        """Poll in the background once Home Assistant has started, keeping the restored data until then."""
+
+        @callback
+        def _async_started(_hass: HomeAssistant) -> None:
+            self.entry.async_create_background_task(
+                self.hass, self.async_refresh(), f"{DOMAIN} first refresh {self.entry.entry_id}"
+            )
+
+        self.entry.async_on_unload(async_at_started(self.hass, _async_started))
+
+    def _data_to_save(self) -> dict:
+        return {"data": self.data, "saved": dt_util.utcnow().isoformat()}
+
+    async def _async_update_data(self) -> dict[str, dict]:
+        """Poll the portal and pick the next poll time from the outcome."""
+        now = dt_util.utcnow()
+        start = time.perf_counter()
+        self.metrics.polls += 1
         try:
-            html = await self._async_get(LOGIN_URL)
-            soup = BeautifulSoup(html, "html.parser")
-            form = {inp.get("name"): inp.get("value", "") for inp in soup.find_all("input") if inp.get("name")}
-
-            form.update({
-                "ctl00$ContentPlaceHolder1$txtUsername": self.username,
-                "ctl00$ContentPlaceHolder1$txtPassword": self.password,
-            })
-
-            await self._async_post(LOGIN_URL, data=form)
-        except Exception as err:
-            _LOGGER.debug("Login attempt failed: %s", err)
-            # Continue; sometimes the usage page is accessible without login
-
-    async def _async_parse_usage(self, html: str) -> dict:
-        """Parse usage HTML and return dict with current, daily, monthly usage."""
-        soup = BeautifulSoup(html, "html.parser")
-        data = {"current_reading": None, "daily_usage": None, "monthly_usage": None, "account": None}
-
-        text = soup.get_text(" ", strip=True)
-
-        numbers = re.findall(r"[0-9,.]+", text)
-
-        def to_float(s: str) -> float | None:
-            try:
-                return float(s.replace(",", ""))
-            except Exception:
-                return None
-
-        # Find current reading
-        for label in ["Total", "Reading", "Current", "Meter"]:
-            idx = text.find(label)
-            if idx != -1:
-                nearby = text[idx: idx + 200]
-                m = re.search(r"([0-9,.]+)", nearby)
-                if m:
-                    val = to_float(m.group(1))
-                    if val is not None:
-                        data["current_reading"] = val
-                        break
-
-        if data["current_reading"] is None and numbers:
-            val = max((to_float(n) or 0) for n in numbers)
-            data["current_reading"] = val
-
-        daily_match = re.search(r"Last\s*24\s*Hours[^0-9]*([0-9,.]+)", text, re.IGNORECASE)
-        if daily_match:
-            data["daily_usage"] = to_float(daily_match.group(1))
-
-        month_match = re.search(r"This\s*Month[^0-9]*([0-9,.]+)", text, re.IGNORECASE)
-        if month_match:
-            data["monthly_usage"] = to_float(month_match.group(1))
-
-        acc_match = re.search(r"Account[:#]*\s*([A-Za-z0-9-]+)", text, re.IGNORECASE)
-        if acc_match:
-            data["account"] = acc_match.group(1)
-
+            data = await self._async_fetch_data()
+        except UpdateFailed as err:
+            self.metrics.failed_polls += 1
+            self.scheduler.record_failure(now, err.__cause__ or err)
+            self.update_interval = self.scheduler.next_interval(now)
+            raise
+        finally:
+            self.metrics.last_poll_seconds = time.perf_counter() - start
+            async_dispatcher_send(self.hass, SIGNAL_METRICS_UPDATED.format(self.entry.entry_id))
+        # Restored data is not a previous poll, so differing from it says nothing about publication time
+        changed = self.data is not None and data != self.data
+        self.scheduler.record_success(now, changed=changed and self.restored_from is None)
+        self.restored_from = None
+        if changed or self.data is None:
+            self._data_store.async_delay_save(self._data_to_save, DATA_SAVE_DELAY)
+        self.update_interval = self.scheduler.next_interval(now)
+        _LOGGER.debug("Next MyH2O poll for %s in %s", self.username, self.update_interval)
         return data
 
-    async def _async_update_data(self) -> dict:
-        """Fetch and parse usage data."""
+    async def _async_fetch_data(self) -> dict[str, dict]:
+        """Fetch and parse usage data for every account behind the login.
+
+        Returns a dict keyed by account number, or by PRIMARY_ACCOUNT when the
+        portal shows a single account, with or without a selector, so its
+        entities keep the unique ids of the single-account layout.
+        """
         try:
-            await self._async_login()
-            html = await self._async_get(USAGE_URL)
-            parsed = await self._async_parse_usage(html)
-            return parsed
+            # A rejected page must be fetched in full again so it can be re-scored
+            html = await self.session.async_fetch_usage(conditional=bool(self.data) and not self._rejections)
+            _LOGGER.debug(
+                "Poll for %s needed %d login(s); %d login(s) avoided so far",
+                self.username,
+                self.session.last_poll_logins,
+                self.session.logins_avoided,
+            )
+            if html is None:
+                self.unchanged_polls += 1
+                self.skipped_parses += len(self.data)
+                _LOGGER.debug("Usage page not modified since last poll, skipped parsing")
+                return self.data
+
+            selector, _ = await async_run_parser(self.hass, parse_service_selector, html)
+            if selector is None or len(selector.accounts) == 1:
+                return {PRIMARY_ACCOUNT: await self._async_parse_usage(PRIMARY_ACCOUNT, html)}
+
+            # The page we already have shows the selected account; post back for the rest
+            others = [account for account in selector.accounts if account != selector.selected]
+            pages = {selector.selected: html}
+            if others:
+                pages.update(await self.session.async_fetch_accounts(html, selector, others))
+
+            parsed = await asyncio.gather(
+                *(self._async_parse_usage(account, page) for account, page in pages.items())
+            )
+            return dict(zip(pages, parsed))
+        except CircuitOpenError as err:
+            _LOGGER.debug("Skipping MyH2O poll for %s: %s", self.username, err)
+            raise UpdateFailed(err) from err
         except Exception as err:
             _LOGGER.exception("Error fetching MyH2O data: %s", err)
-            raise UpdateFailed(err)
-
-    async def async_will_remove_from_hass(self) -> None:
-        if self.session:
-            await self.session.close()
+            raise UpdateFailed(err) from err
+
+    async def async_shutdown(self) -> None:
+        """Save the latest data and schedule and close the portal session when the entry is unloaded."""
+        await super().async_shutdown()
+        await self.session.async_close()
+        if self.data:
+            await self._data_store.async_save(self._data_to_save())
+        if self.scheduler.observations:
+            await self.scheduler.async_save()
@@ -0,0 +1,169 @@
+"""Bill estimate from tiered water and sewer rates, updated as each hour of usage is imported."""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Any, NamedTuple
+
+import homeassistant.util.dt as dt_util
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STORAGE_VERSION
+from .rollup import billing_cycle_start
+
+GALLONS_PER_RATE_UNIT = 1000
+# Less of the cycle than this is too little to project the rest of it from
+MIN_PROJECTION_HOURS = 24
+SAVE_DELAY = 30
+
+
+class Tier(NamedTuple):
+    """A price per 1,000 gallons for cycle usage up to ``up_to`` gallons (None: no limit)."""
+
+    up_to: float | None
+    price: float
+
+
+def parse_tiers(text: str) -> list[Tier]:
+    """Parse ``"2000:3.12, 10000:4.50, 5.80"``: up-to-gallons:price pairs, the last one without a limit.
+
+    Raises ValueError if the tiers are malformed or not in increasing order.
+    """
+    tiers: list[Tier] = []
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        if tiers and tiers[-1].up_to is None:
+            raise ValueError("only the last tier may be unlimited")
+        up_to, _, price = part.rpartition(":")
+        tier = Tier(float(up_to) if up_to else None, float(price))
+        if tier.price < 0 or (tier.up_to is not None and tiers and tier.up_to <= tiers[-1].up_to):
+            raise ValueError(f"invalid tier {part!r}")
+        tiers.append(tier)
+    if tiers and tiers[-1].up_to is not None:
+        # Usage past the last limit is charged at the last price
+        tiers.append(Tier(None, tiers[-1].price))
+    return tiers
+
+
+def tiered_cost(tiers: list[Tier], gallons: float) -> float:
+    """Variable charge for ``gallons`` of usage in one billing cycle."""
+    cost = 0.0
+    floor = 0.0
+    for tier in tiers:
+        ceiling = gallons if tier.up_to is None else min(gallons, tier.up_to)
+        if ceiling <= floor:
+            break
+        cost += (ceiling - floor) / GALLONS_PER_RATE_UNIT * tier.price
+        floor = ceiling
+    return cost
+
+
+def _next_cycle_start(cycle_start: date) -> date:
+    return billing_cycle_start(cycle_start + timedelta(days=32), cycle_start.day)
+
+
+class CostEngine:
+    """Cycle-to-date and projected bill for one login.
+
+    Each imported hour adds its marginal water and sewer charge, the
+    difference in tiered cost before and after it, so the work per hour
+    depends only on the number of tiers. Fixed charges are counted once per
+    cycle. Because the tiered charge depends only on the cycle's gallons, the
+    costs are recomputed from them when the saved state is loaded, so rate
+    changes apply to the current cycle straight away.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        cycle_day: int,
+        water_tiers: list[Tier],
+        sewer_tiers: list[Tier],
+        fixed_charges: float,
+    ) -> None:
+        self.hass = hass
+        self.cycle_day = cycle_day
+        self.water_tiers = water_tiers
+        self.sewer_tiers = sewer_tiers
+        self.fixed_charges = fixed_charges
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.cost")
+        self.cycle_start: date | None = None
+        self.gallons = 0.0
+        self.water_cost = 0.0
+        self.sewer_cost = 0.0
+        self.last_start: float | None = None
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load()
+        if not stored or stored.get("cycle_day") != self.cycle_day:
+            return
+        self.cycle_start = date.fromisoformat(stored["cycle_start"])
+        self.gallons = stored["gallons"]
+        self.last_start = stored["last_start"]
+        self.water_cost = tiered_cost(self.water_tiers, self.gallons)
+        self.sewer_cost = tiered_cost(self.sewer_tiers, self.gallons)
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "cycle_day": self.cycle_day,
+            "cycle_start": self.cycle_start.isoformat() if self.cycle_start else None,
+            "gallons": self.gallons,
+            "last_start": self.last_start,
+        }
+
+    async def async_save(self) -> None:
+        """Write the state now instead of after the save delay."""
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def async_update(self, start: float, usage: float) -> None:
+        """Add the charge for one hour of usage; ``start`` is the hour start in epoch seconds."""
+        if self.last_start is not None and start <= self.last_start:
+            return
+        self.last_start = start
+        day = dt_util.as_local(dt_util.utc_from_timestamp(start)).date()
+        cycle_start = billing_cycle_start(day, self.cycle_day)
+        if cycle_start != self.cycle_start:
+            self.cycle_start = cycle_start
+            self.gallons = self.water_cost = self.sewer_cost = 0.0
+        before = self.gallons
+        self.gallons += usage
+        self.water_cost += tiered_cost(self.water_tiers, self.gallons) - tiered_cost(self.water_tiers, before)
+        self.sewer_cost += tiered_cost(self.sewer_tiers, self.gallons) - tiered_cost(self.sewer_tiers, before)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @property
+    def cycle_cost(self) -> float | None:
+        """Fixed charges plus water and sewer charges for the cycle so far."""
+        if self.cycle_start is None:
+            return None
+        return round(self.fixed_charges + self.water_cost + self.sewer_cost, 2)
+
+    @property
+    def cycle_started(self) -> datetime | None:
+        return dt_util.start_of_local_day(self.cycle_start) if self.cycle_start else None
+
+    @property
+    def projected_cost(self) -> float | None:
+        """The cycle's bill if usage continues at its average rate so far."""
+        if self.cycle_start is None or self.last_start is None:
+            return None
+        start = dt_util.start_of_local_day(self.cycle_start).timestamp()
+        end = dt_util.start_of_local_day(_next_cycle_start(self.cycle_start)).timestamp()
+        elapsed = self.last_start + 3600 - start
+        if elapsed < MIN_PROJECTION_HOURS * 3600:
+            return None
+        gallons = self.gallons * (end - start) / elapsed
+        return round(
+            self.fixed_charges + tiered_cost(self.water_tiers, gallons) + tiered_cost(self.sewer_tiers, gallons), 2
+        )
+
+    @property
+    def attributes(self) -> dict[str, Any]:
+        return {
+            "cycle_start": self.cycle_start.isoformat() if self.cycle_start else None,
+            "cycle_gallons": round(self.gallons, 1),
+            "water_charge": round(self.water_cost, 2),
+            "sewer_charge": round(self.sewer_cost, 2),
+            "fixed_charges": self.fixed_charges,
+        }
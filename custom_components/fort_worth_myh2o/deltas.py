@@ -0,0 +1,106 @@
+"""Batched validation of per-hour usage before it is imported."""
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+HOUR = 3600
+
+
+@dataclass
+class AnomalyReport:
+    """What was corrected while validating one batch of usage (hour starts, epoch seconds)."""
+
+    invalid: int = 0
+    duplicates: int = 0
+    clamped: list[float] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.invalid or self.duplicates or self.clamped)
+
+
+class DeltaBatch(NamedTuple):
+    """Hourly consumption for a batch of per-hour usage."""
+
+    starts: list[float]
+    deltas: list[float]
+    anomalies: AnomalyReport
+
+
+def _dedupe_numpy(epochs: list[float], values: list[float], report: AnomalyReport):
+    """Sort by time and keep the last value of every hour."""
+    ts = np.asarray(epochs, dtype=np.float64)
+    vals = np.asarray(values, dtype=np.float64)
+    order = np.argsort(ts, kind="stable")
+    starts = ts[order] - np.mod(ts[order], HOUR)
+    vals = vals[order]
+
+    keep = np.append(starts[1:] != starts[:-1], True)
+    report.duplicates = int(len(keep) - np.count_nonzero(keep))
+    return starts[keep], vals[keep]
+
+
+def _dedupe_python(epochs: list[float], values: list[float], report: AnomalyReport) -> tuple[list[float], list[float]]:
+    """Sort by time and keep the last value of every hour."""
+    pairs = sorted(zip(epochs, values), key=lambda p: p[0])
+    starts: list[float] = []
+    kept: list[float] = []
+    for epoch, value in pairs:
+        start = epoch - epoch % HOUR
+        if starts and starts[-1] == start:
+            report.duplicates += 1
+            kept[-1] = value
+            continue
+        starts.append(start)
+        kept.append(value)
+    return starts, kept
+
+
+def _clean(epochs: Sequence[float | None], values: Sequence[float | None], report: AnomalyReport) -> tuple[list[float], list[float]]:
+    """Drop readings without a time or value, counting them as invalid."""
+    clean_epochs: list[float] = []
+    clean_values: list[float] = []
+    for epoch, value in zip(epochs, values):
+        if epoch is None or value is None:
+            report.invalid += 1
+            continue
+        clean_epochs.append(epoch)
+        clean_values.append(float(value))
+    return clean_epochs, clean_values
+
+
+def compute_hourly_usage(
+    epochs: Sequence[float | None],
+    usages: Sequence[float | None],
+    use_numpy: bool | None = None,
+) -> DeltaBatch:
+    """Sort, dedupe and validate per-hour usage into hourly consumption.
+
+    ``usages`` is what was used in each hour, not a register reading, so a
+    negative value is a portal correction rather than a rollover or a meter
+    swap: it is clamped to 0 and its hour listed in ``clamped``. Values in the
+    same hour collapse to the last one. NumPy is used when installed unless
+    ``use_numpy`` says otherwise.
+    """
+    report = AnomalyReport()
+    clean_epochs, clean_values = _clean(epochs, usages, report)
+    if not clean_epochs:
+        return DeltaBatch([], [], report)
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        starts, vals = _dedupe_numpy(clean_epochs, clean_values, report)
+        negative = vals < 0
+        report.clamped.extend(starts[negative].tolist())
+        return DeltaBatch(starts.tolist(), np.where(negative, 0.0, vals).tolist(), report)
+    starts, kept = _dedupe_python(clean_epochs, clean_values, report)
+    for start, value in zip(starts, kept):
+        if value < 0:
+            report.clamped.append(start)
+    return DeltaBatch(starts, [max(0.0, value) for value in kept], report)
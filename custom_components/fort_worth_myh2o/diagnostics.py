@@ -0,0 +1,59 @@
+"""Diagnostics support for the Fort Worth MyH2O integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_UNIQUE_ID, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .client import get_http_client
+from .const import DOMAIN
+
+# The entry title is the username, and a unique id would be too
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD, CONF_UNIQUE_ID, "account", "title"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return poll metrics and state for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    session = coordinator.session
+    scheduler = coordinator.scheduler
+    # Account numbers are the keys of the coordinator data, so replace them with positions
+    data = {f"account_{index}": values for index, values in enumerate((coordinator.data or {}).values())}
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "metrics": coordinator.metrics.as_dict(),
+        "session": {
+            "logins": session.logins,
+            "logins_avoided": session.logins_avoided,
+        },
+        "portal_protection": get_http_client(hass).as_dict(),
+        "scheduler": {
+            "publication_minute": scheduler.publication_minute,
+            "observations": scheduler.observations,
+            "failures": scheduler.failures,
+            "update_interval": str(coordinator.update_interval),
+        },
+        "restored_from": coordinator.restored_from,
+        "change_detection": {
+            "unchanged_polls": coordinator.unchanged_polls,
+            "skipped_parses": coordinator.skipped_parses,
+        },
+        "parse_confidence": list(coordinator.parse_confidence.values()),
+        "history_import": _history_diagnostics(coordinator.history),
+        "data": async_redact_data(data, TO_REDACT),
+    }
+
+
+def _history_diagnostics(history) -> dict[str, Any] | None:
+    if history is None:
+        return None
+    return {
+        "import_time": history.scheduler.import_time.isoformat(),
+        "last_run": history.scheduler.last_run.isoformat() if history.scheduler.last_run else None,
+        "backfill": dict(history.engine.progress),
+        "leak": history.detector.attributes,
+        "cost": history.cost.attributes if history.cost is not None else None,
+    }
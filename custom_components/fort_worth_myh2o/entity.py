@@ -0,0 +1,22 @@
+"""Device layout shared by the entity platforms."""
+from __future__ import annotations
+
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from .const import DOMAIN, PRIMARY_ACCOUNT
+
+
+def account_device_info(unique_base: str, account: str) -> DeviceInfo:
+    """Return the device that groups every sensor of one account or meter."""
+    # The primary account's device also carries the login-wide diagnostic sensors
+    if account == PRIMARY_ACCOUNT:
+        return DeviceInfo(
+            identifiers={(DOMAIN, unique_base)},
+            name="Fort Worth MyH2O",
+            manufacturer="City of Fort Worth",
+        )
+    return DeviceInfo(
+        identifiers={(DOMAIN, f"{unique_base}_{account}")},
+        name=f"Fort Worth MyH2O {account}",
+        manufacturer="City of Fort Worth",
+    )
@@ -0,0 +1,37 @@
+"""Run CPU-bound page parsing in the executor with bounded concurrency."""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_PARSE_SEMAPHORE, DOMAIN, PARSE_CONCURRENCY
+
+_T = TypeVar("_T")
+
+
+def _get_semaphore(hass: HomeAssistant) -> asyncio.Semaphore:
+    """Return the semaphore shared by every config entry of this integration."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_PARSE_SEMAPHORE not in domain_data:
+        domain_data[DATA_PARSE_SEMAPHORE] = asyncio.Semaphore(PARSE_CONCURRENCY)
+    return domain_data[DATA_PARSE_SEMAPHORE]
+
+
+def _timed(func: Callable[..., _T], *args: Any) -> tuple[_T, float]:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+async def async_run_parser(hass: HomeAssistant, func: Callable[..., _T], *args: Any) -> tuple[_T, float]:
+    """Run ``func(*args)`` in the executor and return its result and CPU seconds.
+
+    At most PARSE_CONCURRENCY parses run at once, so several accounts polling
+    together cannot take over Home Assistant's shared executor.
+    """
+    async with _get_semaphore(hass):
+        return await hass.async_add_executor_job(_timed, func, *args)
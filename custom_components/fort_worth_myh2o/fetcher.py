@@ -0,0 +1,119 @@
+"""Fetch hourly interval usage through the entry's portal session."""
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import date, datetime, time as dtime, timedelta
+import json
+import logging
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+import homeassistant.util.dt as dt_util
+
+if TYPE_CHECKING:
+    from .cache import ReadingCache
+    from .session import MyH2OSession
+
+_LOGGER = logging.getLogger(__name__)
+
+# Keys the usage chart has used for the hour label and the hourly value
+_HOUR_KEYS = ("Hourly", "Hour", "UsageTime")
+_VALUE_KEYS = ("UsageValue", "Usage", "Value")
+_HOUR_FORMATS = ("%I:%M %p", "%I %p", "%H:%M")
+
+
+class HourlyReading(NamedTuple):
+    """One hour of interval data; ``cumulative`` is the running total since midnight."""
+
+    timestamp: datetime
+    cumulative: float
+    usage: float
+
+
+def hours_in_day(day: date) -> int:
+    """Return how many hours the local ``day`` has: 23 or 25 when DST starts or ends, otherwise 24."""
+    # Aware datetimes sharing a tzinfo subtract as wall time, so compare in UTC
+    start = dt_util.as_utc(dt_util.start_of_local_day(day))
+    end = dt_util.as_utc(dt_util.start_of_local_day(day + timedelta(days=1)))
+    return round((end - start).total_seconds() / 3600)
+
+
+def is_complete_day(day: date, readings: list[HourlyReading]) -> bool:
+    """Return True if ``readings`` has every hour of ``day``."""
+    return len({reading.timestamp.timestamp() for reading in readings}) >= hours_in_day(day)
+
+
+def _first(row: dict[str, Any], keys: tuple[str, ...]) -> Any:
+    for key in keys:
+        if row.get(key) not in (None, ""):
+            return row[key]
+    return None
+
+
+def _parse_hour(value: Any) -> dtime | None:
+    if isinstance(value, (int, float)):
+        return dtime(int(value) % 24)
+    for fmt in _HOUR_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def _rows(payload: str) -> list[dict[str, Any]]:
+    """Unwrap the ASP.NET page method envelope and return the hourly rows."""
+    data: Any = json.loads(payload)
+    if isinstance(data, dict) and "d" in data:
+        data = data["d"]
+        if isinstance(data, str):
+            data = json.loads(data)
+    if isinstance(data, list):
+        return data
+    # The rows live in the first list of objects in the result set
+    for value in data.values():
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            return value
+    return []
+
+
+def iter_hourly_readings(payload: str, day: date) -> Iterator[HourlyReading]:
+    """Yield typed readings for ``day`` from the usage chart JSON, in hour order."""
+    hours: list[tuple[dtime, float]] = []
+    for row in _rows(payload):
+        hour = _parse_hour(_first(row, _HOUR_KEYS))
+        value = _first(row, _VALUE_KEYS)
+        if hour is None or value is None:
+            _LOGGER.debug("Skipping hourly row without hour or value: %s", row)
+            continue
+        try:
+            usage = float(str(value).replace(",", ""))
+        except ValueError:
+            _LOGGER.debug("Skipping hourly row with invalid value: %s", row)
+            continue
+        hours.append((hour, usage))
+
+    tz = dt_util.start_of_local_day(day).tzinfo
+    cumulative = 0.0
+    seen: set[dtime] = set()
+    # The stable sort keeps the repeated hour of a DST fall-back day in portal order
+    for hour, usage in sorted(hours, key=lambda item: item[0]):
+        cumulative += usage
+        yield HourlyReading(datetime.combine(day, hour.replace(fold=int(hour in seen)), tzinfo=tz), cumulative, usage)
+        seen.add(hour)
+
+
+async def async_fetch_cumulative_readings_for_date(
+    session: MyH2OSession, day: date, cache: ReadingCache | None = None
+) -> list[HourlyReading]:
+    """Fetch the hourly readings for ``day`` over the entry's portal session, without a separate login.
+
+    A day found in ``cache`` is returned without touching the portal; a complete
+    day fetched from the portal is added to it.
+    """
+    if cache is not None and (cached := cache.get_day(day)) is not None:
+        return cached
+    payload = await session.async_fetch_hourly(day)
+    readings = list(iter_hourly_readings(payload, day))
+    if cache is not None:
+        await cache.async_put_day(day, readings)
+    return readings
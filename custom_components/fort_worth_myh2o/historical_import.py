@@ -0,0 +1,221 @@
+"""Import hourly usage into long-term statistics in one batch."""
+from __future__ import annotations
+
+from bisect import bisect_left
+import logging
+from collections.abc import Iterable
+from datetime import datetime
+from typing import TYPE_CHECKING, List
+
+import homeassistant.util.dt as dt_util
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics, statistics_during_period
+from homeassistant.const import UnitOfVolume
+from homeassistant.core import HomeAssistant
+from homeassistant.util import slugify
+from homeassistant.util.unit_conversion import VolumeConverter
+
+try:
+    from homeassistant.components.recorder.models import StatisticMeanType
+except ImportError:  # Home Assistant before 2025.4 flags means with has_mean
+    StatisticMeanType = None
+
+from .const import DOMAIN
+from .deltas import AnomalyReport, compute_hourly_usage
+from .fetcher import HourlyReading
+
+if TYPE_CHECKING:
+    from .cost import CostEngine
+    from .leak import LeakDetector
+    from .rollup import RollupIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _ensure_tz(dt: datetime) -> datetime:
+    """Ensure datetime is timezone aware (convert naive as local)."""
+    if dt.tzinfo is None:
+        return dt_util.as_local(dt)
+    return dt
+
+
+def statistic_id_for(username: str) -> str:
+    """Return the external statistic id used for a login's hourly usage."""
+    return f"{DOMAIN}:{slugify(username)}_hourly_usage"
+
+
+class ImportedStatistics:
+    """The hours already in a statistic with their running sums, for filling gaps between them.
+
+    ``starts`` and ``sums`` are the existing hourly rows in time order, as read
+    from the recorder. Hours are inserted in time order: each one continues the
+    sum of the row before it, and every row after an inserted run is shifted
+    up by that run's usage, so the sums stay continuous. ``inserted`` is the
+    usage inserted so far, all of it before the hours still to be visited.
+    """
+
+    def __init__(self, starts: list[float], sums: list[float]) -> None:
+        self.starts = starts
+        self.sums = sums
+        self.inserted = 0.0
+        self.last_start: float | None = starts[-1] if starts else None
+
+    def count_between(self, start: float, end: float) -> int:
+        """Return how many hours in ``[start, end)`` are already imported."""
+        return bisect_left(self.starts, end) - bisect_left(self.starts, start)
+
+
+async def async_get_imported_statistics(hass: HomeAssistant, statistic_id: str) -> ImportedStatistics:
+    """Read every imported hour of ``statistic_id`` and its running sum from the recorder."""
+    stats = await get_instance(hass).async_add_executor_job(
+        statistics_during_period,
+        hass,
+        dt_util.utc_from_timestamp(0),
+        None,
+        {statistic_id},
+        "hour",
+        None,
+        {"sum"},
+    )
+    rows = stats.get(statistic_id, [])
+    return ImportedStatistics([row["start"] for row in rows], [row["sum"] or 0.0 for row in rows])
+
+
+def _series(batches: Iterable[List[HourlyReading]]) -> tuple[list[float | None], list[float | None]]:
+    """Flatten batches into one series of per-hour usage (epoch seconds, values)."""
+    epochs: list[float | None] = []
+    values: list[float | None] = []
+    for readings in batches:
+        for r in readings:
+            if r.timestamp is None or r.usage is None:
+                epochs.append(None)
+                values.append(None)
+                continue
+            epochs.append(_ensure_tz(r.timestamp).timestamp())
+            values.append(float(r.usage))
+    return epochs, values
+
+
+def _build_rows(
+    batches: Iterable[List[HourlyReading]],
+    imported: ImportedStatistics,
+    detector: LeakDetector | None = None,
+    rollups: RollupIndex | None = None,
+    cost: CostEngine | None = None,
+) -> tuple[list[StatisticData], list[tuple[float, float]], AnomalyReport]:
+    """Turn batches of hourly readings into statistics rows for the hours not in ``imported``.
+
+    Also returns the sum adjustments, as (first hour, gallons), to apply to
+    the existing rows after each run of new hours. Rows are computed from the
+    sums as read; the adjustments of this call shift the later new rows too,
+    once they are in the recorder. Every new hour is also fed to
+    ``detector``, ``rollups`` and ``cost``, if given.
+    """
+    epochs, values = _series(batches)
+    batch = compute_hourly_usage(epochs, values)
+
+    starts, sums = imported.starts, imported.sums
+    rows: list[StatisticData] = []
+    adjustments: list[tuple[float, float]] = []
+    total = 0.0
+    # Index of the existing row after the run of new hours being built, and its usage so far
+    gap: int | None = None
+    gap_usage = 0.0
+    running_sum = 0.0
+    for start, delta in zip(batch.starts, batch.deltas):
+        i = bisect_left(starts, start)
+        if i < len(starts) and starts[i] == start:
+            continue
+        if i != gap:
+            if gap is not None and gap < len(starts) and gap_usage:
+                adjustments.append((starts[gap], gap_usage))
+            gap, gap_usage = i, 0.0
+            running_sum = (sums[i - 1] if i else 0.0) + imported.inserted
+        running_sum += delta
+        gap_usage += delta
+        total += delta
+        if detector is not None:
+            detector.async_update(start, delta)
+        if rollups is not None:
+            rollups.async_update(start, delta)
+        if cost is not None:
+            cost.async_update(start, delta)
+        rows.append(StatisticData(start=dt_util.utc_from_timestamp(start), sum=running_sum))
+        if imported.last_start is None or start > imported.last_start:
+            imported.last_start = start
+    if gap is not None and gap < len(starts) and gap_usage:
+        adjustments.append((starts[gap], gap_usage))
+
+    imported.inserted += total
+    return rows, adjustments, batch.anomalies
+
+
+async def async_import_hourly_statistics(
+    hass: HomeAssistant,
+    statistic_id: str,
+    batches: Iterable[List[HourlyReading]],
+    imported: ImportedStatistics | None = None,
+    detector: LeakDetector | None = None,
+    rollups: RollupIndex | None = None,
+    cost: CostEngine | None = None,
+) -> int:
+    """
+    Given batches of hourly readings (each a list of HourlyReading, e.g. one
+    day), validate their per-hour usage in one vectorized pass and add it to
+    the external statistic ``statistic_id`` in a single recorder call.
+
+    Each hour becomes a StatisticData row whose ``sum`` continues from the hour
+    before it in ``imported`` (read from the recorder when not given), and the
+    rows after a filled gap are shifted by its usage, so the Energy dashboard
+    sees consumption at the hour it happened wherever the gap was. Hours already
+    imported are skipped; new hours are fed to the leak ``detector``, the
+    ``rollups`` index and the ``cost`` engine when given. Returns the number of
+    rows written. The recorder writes asynchronously, so callers importing
+    several times in a row should pass the same ``imported`` to every call, in
+    time order.
+    """
+
+    if imported is None:
+        imported = await async_get_imported_statistics(hass, statistic_id)
+
+    rows, adjustments, anomalies = _build_rows(batches, imported, detector, rollups, cost)
+    if detector is not None and rows:
+        detector.async_publish()
+    if anomalies:
+        _LOGGER.warning(
+            "Corrected readings for %s: %d invalid, %d duplicate, %d negative hours clamped to 0",
+            statistic_id,
+            anomalies.invalid,
+            anomalies.duplicates,
+            len(anomalies.clamped),
+        )
+
+    if not rows:
+        _LOGGER.debug("No new readings to import for %s", statistic_id)
+        return 0
+
+    metadata = StatisticMetaData(
+        has_sum=True,
+        name="FW MyH2O Hourly Usage",
+        source=DOMAIN,
+        statistic_id=statistic_id,
+        unit_of_measurement=UnitOfVolume.GALLONS,
+    )
+    if StatisticMeanType is not None:
+        metadata["mean_type"] = StatisticMeanType.NONE
+    else:
+        metadata["has_mean"] = False
+    # Newer releases also record the unit class
+    if "unit_class" in StatisticMetaData.__annotations__:
+        metadata["unit_class"] = VolumeConverter.UNIT_CLASS
+    async_add_external_statistics(hass, metadata, rows)
+    # Queued after the rows, so the recorder shifts the later rows once the gap is in
+    recorder = get_instance(hass)
+    for start, usage in adjustments:
+        recorder.async_adjust_statistics(statistic_id, dt_util.utc_from_timestamp(start), usage, UnitOfVolume.GALLONS)
+    _LOGGER.debug(
+        "Queued %d hourly statistics rows for %s, filling %d gap(s) before existing rows",
+        len(rows), statistic_id, len(adjustments),
+    )
+    return len(rows)
@@ -0,0 +1,147 @@
+"""History import subsystem of a config entry: hourly usage into long-term statistics."""
+from __future__ import annotations
+
+import asyncio
+from datetime import date, time as dtime
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.start import async_at_started
+
+from .backfill import BackfillEngine
+from .cache import ReadingCache
+from .cost import CostEngine, parse_tiers
+from .const import (
+    CONF_BACKFILL_DAYS,
+    CONF_BILLING_CYCLE_DAY,
+    CONF_FIXED_CHARGES,
+    CONF_IMPORT_TIME,
+    CONF_SEWER_RATES,
+    CONF_WATER_RATES,
+    DEFAULT_BACKFILL_DAYS,
+    DEFAULT_BILLING_CYCLE_DAY,
+    DEFAULT_IMPORT_TIME,
+    SIGNAL_HISTORY_IMPORTED,
+)
+from .historical_import import statistic_id_for
+from .import_scheduler import ImportScheduler
+from .leak import LeakDetector
+from .rollup import RollupIndex
+from .session import MyH2OSession
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_import_time(value: str) -> dtime:
+    """Parse an ``HH:MM`` import time."""
+    hour, minute = map(int, value.split(":"))
+    return dtime(hour, minute)
+
+
+class HistoryImporter:
+    """The reading cache, leak detector, rollups, bill estimate, backfill engine and daily scheduler of one entry.
+
+    Everything goes through the entry's portal session, so the import never
+    logs in separately and is covered by the same rate limiter and circuit
+    breaker as the polls. Nothing is read from disk or fetched until Home
+    Assistant has started.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, session: MyH2OSession) -> None:
+        self.hass = hass
+        self.entry = entry
+        username = entry.data["username"]
+        self.statistic_id = statistic_id_for(username)
+        self.cache = ReadingCache(hass, username)
+        self.detector = LeakDetector(hass, entry.entry_id)
+        cycle_day = entry.options.get(CONF_BILLING_CYCLE_DAY, DEFAULT_BILLING_CYCLE_DAY)
+        self.rollups = RollupIndex(hass, entry.entry_id, cycle_day)
+        # Without rates there is nothing to estimate
+        self.cost: CostEngine | None = None
+        if entry.options.get(CONF_WATER_RATES) or entry.options.get(CONF_SEWER_RATES):
+            self.cost = CostEngine(
+                hass,
+                entry.entry_id,
+                cycle_day,
+                parse_tiers(entry.options.get(CONF_WATER_RATES, "")),
+                parse_tiers(entry.options.get(CONF_SEWER_RATES, "")),
+                entry.options.get(CONF_FIXED_CHARGES, 0.0),
+            )
+        self.engine = BackfillEngine(
+            hass, entry.entry_id, self.statistic_id, session, self.cache, self.detector, self.rollups, self.cost
+        )
+        self.backfill_days = entry.options.get(CONF_BACKFILL_DAYS, DEFAULT_BACKFILL_DAYS)
+        self.scheduler = ImportScheduler(
+            hass,
+            entry.entry_id,
+            self.engine,
+            parse_import_time(entry.options.get(CONF_IMPORT_TIME, DEFAULT_IMPORT_TIME)),
+            self.backfill_days,
+        )
+        self._load_lock = asyncio.Lock()
+        self._loaded = False
+        self._unsub_started: CALLBACK_TYPE | None = None
+        self._stopped = False
+
+    async def _async_load(self) -> None:
+        """Read the reading cache and leak state once, on first use."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            await self.cache.async_load()
+            await self.detector.async_load()
+            await self.rollups.async_load()
+            if self.cost is not None:
+                await self.cost.async_load()
+            await self.engine.async_load()
+            self._loaded = True
+        # The leak and history sensors were added before the saved state was read
+        self.detector.async_publish()
+        async_dispatcher_send(self.hass, SIGNAL_HISTORY_IMPORTED.format(self.entry.entry_id))
+
+    async def async_start(self) -> None:
+        """Start the daily import once Home Assistant has started."""
+        self._unsub_started = async_at_started(self.hass, self._async_started)
+
+    async def _async_started(self, _hass: HomeAssistant) -> None:
+        self._unsub_started = None
+        await self._async_load()
+        if self._stopped:
+            return
+        await self.scheduler.async_start()
+        _LOGGER.debug("History import for %s scheduled at %s", self.statistic_id, self.scheduler.import_time)
+
+    async def async_stop(self) -> None:
+        """Cancel the schedule and any import in progress, and save what was imported."""
+        self._stopped = True
+        if self._unsub_started is not None:
+            self._unsub_started()
+            self._unsub_started = None
+        await self.scheduler.async_stop()
+        if not self._loaded:
+            return
+        # A delayed save would otherwise be written after a reloaded entry read the old state
+        await self.detector.async_save()
+        await self.rollups.async_save()
+        if self.cost is not None:
+            await self.cost.async_save()
+
+    async def async_backfill(self, days: int | None = None) -> dict:
+        """Import missing days now and report the outcome."""
+        await self._async_load()
+        result = await self.engine.async_run(days or self.backfill_days)
+        return {
+            "statistic_id": self.statistic_id,
+            **self.engine.progress,
+            "rows_imported": result.rows,
+            "complete": result.stopped_at is None,
+            "stopped_at": result.stopped_at.isoformat() if result.stopped_at else None,
+            "failed": result.failed,
+        }
+
+    async def async_query_usage(self, period: str, start: date | None, end: date | None) -> dict:
+        """Answer a usage range query from the rollup index."""
+        await self._async_load()
+        return self.rollups.query(period, start, end)
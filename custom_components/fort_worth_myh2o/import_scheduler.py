@@ -0,0 +1,126 @@
+"""Run the daily history import from HA time tracking, with catch-up after restarts."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date, datetime, time as dtime, timedelta
+
+import homeassistant.util.dt as dt_util
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_point_in_time, async_track_time_change
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.storage import Store
+
+from .backfill import BackfillEngine
+from .const import DOMAIN, IMPORT_CATCH_UP_DELAY, IMPORT_RETRY_DELAY, STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ImportScheduler:
+    """Trigger the backfill engine once a day at ``import_time``.
+
+    The date of the last completed run is saved, so a run missed while Home
+    Assistant was down is made up IMPORT_CATCH_UP_DELAY seconds after it has
+    started. Only one run is in flight at a time. A run that raised, or that
+    stopped early because a fetch failed or the circuit was open, is not
+    recorded and is retried with a point-in-time timer; everything is
+    cancelled by ``async_stop``.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry_id: str, engine: BackfillEngine, import_time: dtime, backfill_days: int
+    ) -> None:
+        self.hass = hass
+        self.entry_id = entry_id
+        self.engine = engine
+        self.import_time = import_time
+        self.backfill_days = backfill_days
+        self.last_run: date | None = None
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.import_scheduler")
+        self._unsubs: list[CALLBACK_TYPE] = []
+        self._pending_unsub: CALLBACK_TYPE | None = None
+        self._task: asyncio.Task | None = None
+
+    async def async_start(self) -> None:
+        """Load the last run, start the daily trigger and catch up once HA has started."""
+        stored = await self._store.async_load()
+        if stored and stored.get("last_run"):
+            self.last_run = date.fromisoformat(stored["last_run"])
+
+        self._unsubs.append(
+            async_track_time_change(
+                self.hass,
+                self._handle_trigger,
+                hour=self.import_time.hour,
+                minute=self.import_time.minute,
+                second=0,
+            )
+        )
+        self._unsubs.append(async_at_started(self.hass, self._async_catch_up))
+
+    async def _async_catch_up(self, _hass: HomeAssistant) -> None:
+        now = dt_util.now()
+        due = datetime.combine(now.date(), self.import_time, tzinfo=now.tzinfo)
+        # The most recent run that should have happened by now
+        expected = now.date() if now >= due else now.date() - timedelta(days=1)
+        if self.last_run is None or self.last_run < expected:
+            _LOGGER.info(
+                "catching up on import missed since %s in %d seconds", self.last_run or "install", IMPORT_CATCH_UP_DELAY
+            )
+            # Not straight away, so the import does not compete with the rest of startup
+            self._pending_unsub = async_call_later(self.hass, IMPORT_CATCH_UP_DELAY, self._handle_trigger)
+
+    @callback
+    def _handle_trigger(self, _now: datetime | None = None) -> None:
+        self._schedule_run()
+
+    @callback
+    def _schedule_run(self) -> None:
+        if self._task is not None and not self._task.done():
+            _LOGGER.debug("import already running, not starting another")
+            return
+        if self._pending_unsub is not None:
+            self._pending_unsub()
+            self._pending_unsub = None
+        self._task = self.hass.async_create_background_task(self._async_run(), name=f"{DOMAIN} import {self.entry_id}")
+
+    @callback
+    def _schedule_retry(self) -> None:
+        self._pending_unsub = async_track_point_in_time(
+            self.hass, self._handle_trigger, dt_util.utcnow() + timedelta(seconds=IMPORT_RETRY_DELAY)
+        )
+
+    async def _async_run(self) -> None:
+        try:
+            result = await self.engine.async_run(self.backfill_days)
+        except Exception:
+            _LOGGER.exception("import failed, retrying in %d seconds", IMPORT_RETRY_DELAY)
+            self._schedule_retry()
+            return
+        if result.failed:
+            # Not recorded as run, so a restart before the retry catches up as well
+            _LOGGER.warning(
+                "import stopped at %s after %d rows, retrying in %d seconds",
+                result.stopped_at, result.rows, IMPORT_RETRY_DELAY,
+            )
+            self._schedule_retry()
+            return
+        self.last_run = dt_util.now().date()
+        await self._store.async_save({"last_run": self.last_run.isoformat()})
+        _LOGGER.info("import completed, %d statistics rows written", result.rows)
+
+    async def async_stop(self) -> None:
+        """Cancel the triggers and any run in progress."""
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs.clear()
+        if self._pending_unsub is not None:
+            self._pending_unsub()
+            self._pending_unsub = None
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
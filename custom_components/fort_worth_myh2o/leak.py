@@ -0,0 +1,160 @@
+"""Streaming leak detection over hourly usage."""
+from __future__ import annotations
+
+import logging
+import math
+from typing import Any
+
+import homeassistant.util.dt as dt_util
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, EVENT_LEAK_DETECTED, SIGNAL_LEAK_UPDATE, STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+HOURS_PER_DAY = 24
+# Usage at or below this many gallons counts as a zero-flow hour
+ZERO_FLOW_GALLONS = 0.5
+# Hours of uninterrupted flow that indicate a leak
+CONTINUOUS_FLOW_HOURS = 24
+# Baseline smoothing per hour of day, and samples needed before spikes are flagged
+BASELINE_ALPHA = 0.1
+MIN_BASELINE_SAMPLES = 7
+SPIKE_SIGMA = 4.0
+SPIKE_MIN_GALLONS = 50.0
+# A spike keeps the sensor on for this long after its hour, so a daily import cannot hide it
+SPIKE_HOLD = 24 * 3600
+# Only hours this recent raise events; older hours (backfills) just update state
+EVENT_MAX_AGE = 48 * 3600
+SAVE_DELAY = 30
+
+
+class LeakDetector:
+    """Leak analysis of the imported meter that is updated one hour at a time.
+
+    The history import reads the hourly usage the portal shows for the login
+    by default, so there is one detector, and one set of baselines, per entry.
+    Keeps an exponentially weighted mean and variance for each hour of the day
+    plus a run length of non-zero hours, so memory is constant and no history
+    is rescanned. A spike stays flagged until SPIKE_HOLD after its hour, so
+    the sensor shows a spike anywhere in the last imported day. Hours at or
+    before the last one seen are ignored, which makes re-imports harmless.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.hass = hass
+        self.entry_id = entry_id
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.leak")
+        self._mean = [0.0] * HOURS_PER_DAY
+        self._var = [0.0] * HOURS_PER_DAY
+        self._samples = [0] * HOURS_PER_DAY
+        self.flow_hours = 0
+        self.last_start: float | None = None
+        self.continuous_flow = False
+        self.spike = False
+        # Start of the latest hour flagged as a spike
+        self.spike_start: float | None = None
+        self.last_usage: float | None = None
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        self._mean = stored["mean"]
+        self._var = stored["var"]
+        self._samples = stored["samples"]
+        self.flow_hours = stored["flow_hours"]
+        self.last_start = stored["last_start"]
+        self.continuous_flow = stored["continuous_flow"]
+        self.spike = stored["spike"]
+        self.spike_start = stored.get("spike_start")
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "mean": self._mean,
+            "var": self._var,
+            "samples": self._samples,
+            "flow_hours": self.flow_hours,
+            "last_start": self.last_start,
+            "continuous_flow": self.continuous_flow,
+            "spike": self.spike,
+            "spike_start": self.spike_start,
+        }
+
+    async def async_save(self) -> None:
+        """Write the state now instead of after the save delay."""
+        await self._store.async_save(self._data_to_save())
+
+    @property
+    def attributes(self) -> dict[str, Any]:
+        last_hour = dt_util.utc_from_timestamp(self.last_start).isoformat() if self.last_start else None
+        spike_hour = dt_util.utc_from_timestamp(self.spike_start).isoformat() if self.spike_start else None
+        return {
+            "flow_hours": self.flow_hours,
+            "last_usage": self.last_usage,
+            "last_hour": last_hour,
+            "spike_hour": spike_hour,
+        }
+
+    @callback
+    def async_update(self, start: float, usage: float) -> None:
+        """Feed one hour of usage; ``start`` is the hour start in epoch seconds."""
+        if self.last_start is not None and start <= self.last_start:
+            return
+        if self.last_start is not None and start - self.last_start > 3600:
+            # A gap in the data breaks the continuous-flow run
+            self.flow_hours = 0
+        self.last_start = start
+        self.last_usage = usage
+
+        hour_of_day = dt_util.as_local(dt_util.utc_from_timestamp(start)).hour
+        self.flow_hours = self.flow_hours + 1 if usage > ZERO_FLOW_GALLONS else 0
+        continuous_flow = self.flow_hours >= CONTINUOUS_FLOW_HOURS
+
+        mean, var, samples = self._mean[hour_of_day], self._var[hour_of_day], self._samples[hour_of_day]
+        spike = (
+            samples >= MIN_BASELINE_SAMPLES
+            and usage - mean > max(SPIKE_SIGMA * math.sqrt(var), SPIKE_MIN_GALLONS)
+        )
+        # Spikes do not pull the baseline up
+        if not spike:
+            diff = usage - mean
+            incr = BASELINE_ALPHA * diff
+            self._mean[hour_of_day] = mean + incr if samples else usage
+            self._var[hour_of_day] = (1 - BASELINE_ALPHA) * (var + diff * incr) if samples else 0.0
+            self._samples[hour_of_day] = samples + 1
+
+        recent = dt_util.utcnow().timestamp() - start <= EVENT_MAX_AGE
+        if continuous_flow and not self.continuous_flow and recent:
+            self._fire("continuous_flow", start, usage)
+        if spike:
+            # One event per run of spike hours
+            if recent and self.spike_start != start - 3600:
+                self._fire("spike", start, usage)
+            self.spike_start = start
+        self.continuous_flow = continuous_flow
+        self.spike = self.spike_start is not None and start - self.spike_start < SPIKE_HOLD
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _fire(self, kind: str, start: float, usage: float) -> None:
+        _LOGGER.warning(
+            "possible leak (%s) in hour starting %s: %s gal",
+            kind, dt_util.utc_from_timestamp(start).isoformat(), usage,
+        )
+        self.hass.bus.async_fire(
+            EVENT_LEAK_DETECTED,
+            {
+                "config_entry_id": self.entry_id,
+                "type": kind,
+                "hour_start": dt_util.utc_from_timestamp(start).isoformat(),
+                "usage": usage,
+                "flow_hours": self.flow_hours,
+            },
+        )
+
+    @callback
+    def async_publish(self) -> None:
+        """Tell the binary sensors to pick up the latest state."""
+        async_dispatcher_send(self.hass, SIGNAL_LEAK_UPDATE.format(self.entry_id))
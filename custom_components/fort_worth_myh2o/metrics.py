@@ -0,0 +1,98 @@
+"""Per-entry poll instrumentation: phase timings and request counters."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+import time
+from typing import Any
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded
+HISTOGRAM_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PHASE_LOGIN = "login"
+PHASE_FETCH = "fetch"
+PHASE_PARSE = "parse"
+
+
+class PhaseHistogram:
+    """Latency histogram for one phase of a poll."""
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last: float | None = None
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect_left(HISTOGRAM_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+    def as_dict(self) -> dict[str, Any]:
+        labels = [f"<={bound}s" for bound in HISTOGRAM_BUCKETS] + [f">{HISTOGRAM_BUCKETS[-1]}s"]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "max": self.max,
+            "last": self.last,
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class PollMetrics:
+    """Counters and phase histograms for one config entry since startup."""
+
+    def __init__(self) -> None:
+        self.phases = {phase: PhaseHistogram() for phase in (PHASE_LOGIN, PHASE_FETCH, PHASE_PARSE)}
+        self.polls = 0
+        self.failed_polls = 0
+        self.http_requests = 0
+        # Bytes on the wire, after compression, and bytes after decompression
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        self.early_stops = 0
+        self.login_retries = 0
+        self.parser_fallbacks: dict[str, int] = {}
+        self.rejected_parses = 0
+        self.last_poll_seconds: float | None = None
+
+    def observe(self, phase: str, seconds: float) -> None:
+        self.phases[phase].observe(seconds)
+
+    @contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        """Time the enclosed block into ``phase``, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+
+    def record_response(self, wire_bytes: int, body_bytes: int, stopped_early: bool = False) -> None:
+        self.http_requests += 1
+        self.bytes_received += wire_bytes
+        self.bytes_decoded += body_bytes
+        self.early_stops += stopped_early
+
+    def record_fallbacks(self, fallbacks: tuple[str, ...]) -> None:
+        for name in fallbacks:
+            self.parser_fallbacks[name] = self.parser_fallbacks.get(name, 0) + 1
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "polls": self.polls,
+            "failed_polls": self.failed_polls,
+            "last_poll_seconds": self.last_poll_seconds,
+            "http_requests": self.http_requests,
+            "bytes_received": self.bytes_received,
+            "bytes_decoded": self.bytes_decoded,
+            "early_stops": self.early_stops,
+            "login_retries": self.login_retries,
+            "parser_fallbacks": dict(self.parser_fallbacks),
+            "rejected_parses": self.rejected_parses,
+            "phases": {phase: hist.as_dict() for phase, hist in self.phases.items()},
+        }
@@ -0,0 +1,282 @@
+"""Single-pass parser for the MyH2O usage page.
+
+The usage page is a large ASP.NET document, most of which is hidden
+``__VIEWSTATE`` data and scripts. Instead of building a full soup we tokenize
+the markup once, keep only visible text, and run precompiled patterns over it.
+The regex tokenizer is used because it measured fastest on the saved
+fixtures. An lxml backend, when installed, can be passed to
+:func:`parse_usage` so ``benchmarks/bench_parser.py`` can compare the two; the
+integration itself always uses the tokenizer. The
+usage labels the portal renders with known element IDs are read straight from
+the markup before any text pattern is tried.
+"""
+from __future__ import annotations
+
+import hashlib
+import html as html_lib
+from importlib.util import find_spec
+import re
+from typing import NamedTuple
+
+# lxml is only imported when that backend is used, so it is never loaded by default
+LXML_AVAILABLE = find_spec("lxml") is not None
+PARSER_BACKEND = "regex"
+
+# Comments, non-text containers and tags are all separators between text nodes
+_TOKEN_RE = re.compile(
+    r"<!--.*?-->|<(script|style|template)\b[^>]*>.*?</\1\s*>|<[^>]*>",
+    re.IGNORECASE | re.DOTALL,
+)
+_ACCOUNT_RE = re.compile(r"Account[:#]*\s*([A-Za-z0-9-]+)", re.IGNORECASE)
+
+# Parts of the page that change on every request without the usage changing
+_VOLATILE_RE = re.compile(
+    r"<!--.*?-->|<script\b[^>]*>.*?</script\s*>|<input\b[^>]*\btype\s*=\s*[\"']?hidden\b[^>]*>",
+    re.IGNORECASE | re.DOTALL,
+)
+_INPUT_RE = re.compile(r"<input\b([^>]*)>", re.IGNORECASE)
+_SELECT_RE = re.compile(r"<select\b([^>]*)>(.*?)</select\s*>", re.IGNORECASE | re.DOTALL)
+_OPTION_RE = re.compile(r"<option\b([^>]*)>", re.IGNORECASE)
+_ATTR_RE = re.compile(r"""([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+# Drop-downs the portal uses to switch between accounts or meters
+_SERVICE_FIELD_RE = re.compile(r"account|meter|premise", re.IGNORECASE)
+
+_SEPARATOR = "\x00"
+
+# Byte patterns that let a download stop once everything the parsers read has
+# arrived: all the usage labels and then the end of the form, which holds the
+# hidden fields. The scripts after the form are never read.
+_FORM_END = re.compile(rb"</form\s*>", re.IGNORECASE)
+LOGIN_PAGE_MARKERS = (_FORM_END,)
+USAGE_PAGE_MARKERS = (
+    re.compile(rb"Read(?:ing)?\b", re.IGNORECASE),
+    re.compile(rb"Last\s*24\s*Hours", re.IGNORECASE),
+    re.compile(rb"This\s*Month", re.IGNORECASE),
+    _FORM_END,
+)
+
+
+class FieldLocator(NamedTuple):
+    """One way of finding a field in the page and how far it is trusted.
+
+    Text locators run ``pattern`` over the visible text. Element locators
+    read the label whose client ID ends in ``element_id`` from the markup.
+    """
+
+    name: str
+    pattern: re.Pattern[str]
+    confidence: float
+    element_id: str = ""
+
+
+_VALUE = r"([0-9][0-9,]*(?:\.[0-9]+)?)"
+# The number inside the usage labels, e.g. <span id="ctl00_ContentPlaceHolder1_lblMeterRead">.
+# One pass over the markup finds all of them; the literal "lbl" prefix lets the
+# search skip through the view state quickly. The ID must end at the label name,
+# so e.g. lblMeterReadDate is not taken for lblMeterRead.
+_ELEMENT_VALUE_RE = re.compile(rf"""(lbl(?:MeterRead|Last24|ThisMonth))(?=["'\s/>])["']?[^<>]*>\s*{_VALUE}\s*<""")
+
+
+def _element_id(element_id: str) -> FieldLocator:
+    return FieldLocator("element_id", _ELEMENT_VALUE_RE, 1.0, element_id)
+
+
+# Locators per field, tried in order; the first one that matches wins
+FIELD_LOCATORS: dict[str, tuple[FieldLocator, ...]] = {
+    "current_reading": (
+        _element_id("lblMeterRead"),
+        FieldLocator(
+            "reading_label",
+            re.compile(rf"\b(?:Meter|Current(?:\s*Meter)?)\s*Read(?:ing)?\b\W{{0,10}}{_VALUE}", re.IGNORECASE),
+            1.0,
+        ),
+        FieldLocator("total_label", re.compile(rf"\bTotal\b[^0-9]{{0,40}}{_VALUE}", re.IGNORECASE), 0.7),
+        FieldLocator(
+            "nearby_label", re.compile(rf"\b(?:Reading|Current|Meter)\b[^0-9]{{0,40}}{_VALUE}", re.IGNORECASE), 0.5
+        ),
+    ),
+    "daily_usage": (
+        _element_id("lblLast24"),
+        FieldLocator("last_24_hours", re.compile(rf"Last\s*24\s*Hours[^0-9]{{0,40}}{_VALUE}", re.IGNORECASE), 1.0),
+    ),
+    "monthly_usage": (
+        _element_id("lblThisMonth"),
+        FieldLocator("this_month", re.compile(rf"This\s*Month[^0-9]{{0,40}}{_VALUE}", re.IGNORECASE), 1.0),
+    ),
+}
+
+# Parses scoring below this are not published. Only the labels that hold the meter
+# reading score 1.0; weaker locators are kept to report a changed page, never to publish
+MIN_CONFIDENCE = 1.0
+# A reading this many gallons above the previous one is more likely a misparse than usage
+MAX_READING_STEP = 100_000
+
+
+class UsageExtraction(NamedTuple):
+    """Parsed usage values with the confidence of the locator that found each one."""
+
+    data: dict
+    confidence: dict[str, float]
+    # Weaker locators that had to be used, as "<field>_<locator>"
+    fallbacks: tuple[str, ...]
+
+
+class ServiceSelector(NamedTuple):
+    """The drop-down used to switch the usage page between accounts."""
+
+    field: str
+    accounts: list[str]
+    selected: str | None
+
+
+def _to_float(value: str) -> float | None:
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _regex_text(html: str) -> str:
+    chunks = _TOKEN_RE.sub(_SEPARATOR, html).split(_SEPARATOR)
+    parts = (html_lib.unescape(chunk).strip() for chunk in chunks if chunk)
+    return " ".join(part for part in parts if part)
+
+
+def _lxml_text(html: str) -> str:
+    from lxml import etree
+    from lxml import html as lxml_html
+
+    if not html.strip():
+        return ""
+    parser = lxml_html.HTMLParser(remove_comments=True, remove_pis=True)
+    root = lxml_html.document_fromstring(html, parser=parser)
+    etree.strip_elements(root, "script", "style", "template", with_tail=False)
+    parts = (part.strip() for part in root.itertext())
+    return " ".join(part for part in parts if part)
+
+
+def html_to_text(html: str, backend: str = PARSER_BACKEND) -> str:
+    """Return the visible text of a page, one space between text nodes."""
+    if backend == "lxml":
+        return _lxml_text(html)
+    return _regex_text(html)
+
+
+def parse_usage_text(text: str, html: str = "") -> dict:
+    """Extract usage values from the visible text of the usage page."""
+    return extract_usage(text, html).data
+
+
+def extract_usage(text: str, html: str = "") -> UsageExtraction:
+    """Extract usage values with explicit locators; nothing is guessed.
+
+    ``html`` is the page markup for the element ID locators; without it only
+    the text locators are tried.
+    """
+    data = {"current_reading": None, "daily_usage": None, "monthly_usage": None, "account": None}
+    confidence = {}
+    fallbacks = []
+    elements: dict[str, str] = {}
+    for match in _ELEMENT_VALUE_RE.finditer(html):
+        elements.setdefault(match.group(1), match.group(2))
+
+    for field, locators in FIELD_LOCATORS.items():
+        confidence[field] = 0.0
+        for locator in locators:
+            if locator.element_id:
+                raw = elements.get(locator.element_id)
+            else:
+                raw = match.group(1) if (match := locator.pattern.search(text)) else None
+            if raw is None or (value := _to_float(raw)) is None:
+                continue
+            data[field] = value
+            confidence[field] = locator.confidence
+            if locator.confidence < locators[0].confidence:
+                fallbacks.append(f"{field}_{locator.name}")
+            break
+
+    if acc_match := _ACCOUNT_RE.search(text):
+        data["account"] = acc_match.group(1)
+
+    return UsageExtraction(data, confidence, tuple(fallbacks))
+
+
+def score_usage(extraction: UsageExtraction, previous: dict | None) -> tuple[float, list[str]]:
+    """Score a parse from 0 to 1 and list why it lost confidence.
+
+    The score starts from the confidence of the current reading's locator.
+    The meter only counts up, so a reading below ``previous`` or more than
+    MAX_READING_STEP above it scores 0.
+    """
+    reading = extraction.data["current_reading"]
+    if reading is None:
+        return 0.0, ["current reading not found"]
+    score = extraction.confidence["current_reading"]
+    problems = []
+    if score < 1.0:
+        problems.append(f"current reading found by a weak label ({score:.1f})")
+
+    last = previous.get("current_reading") if previous else None
+    if last is not None:
+        if reading < last:
+            return 0.0, [f"current reading went backwards ({last} -> {reading})"]
+        if reading - last > MAX_READING_STEP:
+            return 0.0, [f"current reading jumped by {reading - last:.0f} gal ({last} -> {reading})"]
+    return score, problems
+
+
+def parse_usage(html: str, backend: str = PARSER_BACKEND) -> dict:
+    """Parse usage HTML and return dict with current, daily, monthly usage."""
+    return parse_usage_text(html_to_text(html, backend), html)
+
+
+def usage_fingerprint(html: str) -> str:
+    """Hash the page without view state and scripts, to tell if the usage changed."""
+    return hashlib.blake2b(_VOLATILE_RE.sub("", html).encode(), digest_size=16).hexdigest()
+
+
+def parse_usage_if_changed(html: str, previous_fingerprint: str | None) -> tuple[str, UsageExtraction | None]:
+    """Return the page fingerprint, plus the extracted usage only if the page changed."""
+    fingerprint = usage_fingerprint(html)
+    if fingerprint == previous_fingerprint:
+        return fingerprint, None
+    return fingerprint, extract_usage(html_to_text(html), html)
+
+
+def _attributes(fragment: str) -> dict[str, str]:
+    attrs = {}
+    for name, dquoted, squoted, bare in _ATTR_RE.findall(fragment):
+        attrs[name.lower()] = html_lib.unescape(dquoted or squoted or bare)
+    return attrs
+
+
+def parse_hidden_fields(html: str) -> dict[str, str]:
+    """Return the hidden ASP.NET form fields needed to post the page back."""
+    fields = {}
+    for match in _INPUT_RE.finditer(html):
+        attrs = _attributes(match.group(1))
+        if attrs.get("type", "").lower() == "hidden" and attrs.get("name"):
+            fields[attrs["name"]] = attrs.get("value", "")
+    return fields
+
+
+def parse_service_selector(html: str) -> ServiceSelector | None:
+    """Find the account/meter drop-down and list the values it offers."""
+    for match in _SELECT_RE.finditer(html):
+        attrs = _attributes(match.group(1))
+        field = attrs.get("name")
+        if not field or not _SERVICE_FIELD_RE.search(field):
+            continue
+        accounts = []
+        selected = None
+        for option in _OPTION_RE.finditer(match.group(2)):
+            option_attrs = _attributes(option.group(1))
+            value = option_attrs.get("value", "").strip()
+            if not value or value in accounts:
+                continue
+            accounts.append(value)
+            if "selected" in option_attrs:
+                selected = value
+        if accounts:
+            return ServiceSelector(field, accounts, selected or accounts[0])
+    return None
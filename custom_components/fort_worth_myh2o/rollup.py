@@ -0,0 +1,106 @@
+"""Running usage totals per day, ISO week, month and billing cycle, kept up to date hour by hour."""
+from __future__ import annotations
+
+from datetime import date, timedelta
+import logging
+from typing import Any
+
+import homeassistant.util.dt as dt_util
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+PERIOD_DAY = "day"
+PERIOD_WEEK = "week"
+PERIOD_MONTH = "month"
+PERIOD_BILLING_CYCLE = "billing_cycle"
+PERIODS = (PERIOD_DAY, PERIOD_WEEK, PERIOD_MONTH, PERIOD_BILLING_CYCLE)
+SAVE_DELAY = 30
+
+
+def billing_cycle_start(day: date, cycle_day: int) -> date:
+    """Return the first day of the billing cycle that ``day`` falls in."""
+    if day.day >= cycle_day:
+        return day.replace(day=cycle_day)
+    last_month = day.replace(day=1) - timedelta(days=1)
+    return last_month.replace(day=cycle_day)
+
+
+class RollupIndex:
+    """Gallons per day, ISO week, month and billing cycle for one login.
+
+    Every bucket is keyed by the ISO date it starts on, so keys sort in time
+    order and a range query is a string comparison. Each new hour adds to
+    four buckets, which is constant work however much history there is.
+    Hours at or before the last one seen are ignored, like the leak detector,
+    so re-imports are harmless.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, cycle_day: int) -> None:
+        self.hass = hass
+        self.cycle_day = cycle_day
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.rollups")
+        self.buckets: dict[str, dict[str, float]] = {period: {} for period in PERIODS}
+        self.last_start: float | None = None
+        # The local day of the last hour and its bucket keys, reused until the day changes
+        self._day: date | None = None
+        self._keys: tuple[str, ...] = ()
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        if stored.get("cycle_day") != self.cycle_day:
+            # Cycle buckets built on another start day cannot be split up again
+            stored["buckets"][PERIOD_BILLING_CYCLE] = {}
+            _LOGGER.info("Billing cycle day changed, cycle totals restart from the next import")
+        self.buckets = {period: stored["buckets"].get(period, {}) for period in PERIODS}
+        self.last_start = stored["last_start"]
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"cycle_day": self.cycle_day, "last_start": self.last_start, "buckets": self.buckets}
+
+    async def async_save(self) -> None:
+        """Write the state now instead of after the save delay."""
+        await self._store.async_save(self._data_to_save())
+
+    def _bucket_keys(self, day: date) -> tuple[str, ...]:
+        if day != self._day:
+            self._day = day
+            self._keys = (
+                day.isoformat(),
+                (day - timedelta(days=day.weekday())).isoformat(),
+                day.replace(day=1).isoformat(),
+                billing_cycle_start(day, self.cycle_day).isoformat(),
+            )
+        return self._keys
+
+    @callback
+    def async_update(self, start: float, usage: float) -> None:
+        """Add one hour of usage; ``start`` is the hour start in epoch seconds."""
+        if self.last_start is not None and start <= self.last_start:
+            return
+        self.last_start = start
+        day = dt_util.as_local(dt_util.utc_from_timestamp(start)).date()
+        for period, key in zip(PERIODS, self._bucket_keys(day)):
+            buckets = self.buckets[period]
+            buckets[key] = buckets.get(key, 0.0) + usage
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def query(self, period: str, start: date | None = None, end: date | None = None) -> dict[str, Any]:
+        """Return the buckets of ``period`` starting between ``start`` and ``end`` (inclusive) and their total."""
+        low = start.isoformat() if start else ""
+        high = end.isoformat() if end else "9999"
+        buckets = [
+            {"start": key, "gallons": round(gallons, 2)}
+            for key, gallons in self.buckets[period].items()
+            if low <= key <= high
+        ]
+        return {
+            "period": period,
+            "buckets": buckets,
+            "total": round(sum(bucket["gallons"] for bucket in buckets), 2),
+        }
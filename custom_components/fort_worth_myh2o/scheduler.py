@@ -0,0 +1,171 @@
+"""Adaptive poll scheduling aligned to when the portal publishes new readings."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+import logging
+import random
+
+from aiohttp import ClientResponseError, hdrs
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STORAGE_VERSION
+from .throttle import CircuitOpenError
+
+_LOGGER = logging.getLogger(__name__)
+
+MINUTES_PER_HOUR = 60
+# Observations needed before we trust the learned publication minute
+MIN_OBSERVATIONS = 3
+# Older observations fade so a portal schedule change is picked up
+OBSERVATION_DECAY = 0.9
+# The first poll of each hour comes this many minutes after the learned publication minute
+WINDOW_MARGIN = 3
+# One more poll this long after a window poll that found no new reading
+LATE_RETRY_INTERVAL = 600  # seconds
+# A change seen this close before the next window already covers that window
+MIN_CHANGE_GAP = 1800  # seconds
+# While learning, every other gap is at most this long, so that pair of polls is within one hour
+LEARNING_SHORT_GAP = 1800  # seconds
+FAILURE_BASE_INTERVAL = 60  # seconds
+MAX_FAILURE_INTERVAL = 6 * 3600  # seconds
+JITTER_FRACTION = 0.1
+SAVE_DELAY = 60  # seconds
+
+
+def _retry_after(err: BaseException, now: datetime) -> float | None:
+    """Return the delay in seconds requested by a Retry-After header or the circuit breaker, if any."""
+    if isinstance(err, CircuitOpenError):
+        return err.retry_after
+    if not isinstance(err, ClientResponseError) or not err.headers:
+        return None
+    value = err.headers.get(hdrs.RETRY_AFTER)
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - now).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptivePollScheduler:
+    """Learn the minute of the hour new readings appear and poll just after it.
+
+    Two polls less than an hour apart tell whether a reading was published in
+    the minutes between them. A new reading adds evidence spread over those
+    minutes of a decaying per-minute histogram, and no new reading takes it
+    away, so the publication minute collects the most. Polls an hour or more
+    apart always see a new reading and are not counted.
+
+    While learning, every other gap is at most LEARNING_SHORT_GAP, so half
+    the pairs of polls fall within the same hour whatever ``max_interval``
+    is, and the gaps between them are ``max_interval``. Once learned, each
+    hour gets one poll a few minutes after the peak, and one retry if the
+    reading is late. Failures back off exponentially. No wait is ever longer
+    than ``max_interval``, unless the portal or the circuit breaker asks for
+    a longer one with Retry-After. All delays get random jitter so many
+    installations do not hit the portal at the same moment.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, max_interval: int) -> None:
+        self.max_interval = max_interval
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.scheduler")
+        self._histogram = [0.0] * MINUTES_PER_HOUR
+        self.observations = 0
+        self._last_poll: datetime | None = None
+        # Polls in a row that found no new reading
+        self._misses = 0
+        self._learning_short_gap = True
+        self.failures = 0
+        self._retry_after: float | None = None
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load()
+        if stored and len(stored.get("histogram", [])) == MINUTES_PER_HOUR:
+            self._histogram = [float(v) for v in stored["histogram"]]
+            self.observations = stored.get("observations", 0)
+
+    def _data_to_save(self) -> dict:
+        return {"histogram": self._histogram, "observations": self.observations}
+
+    async def async_save(self) -> None:
+        """Write what was learned now instead of after the save delay."""
+        await self._store.async_save(self._data_to_save())
+
+    @property
+    def publication_minute(self) -> int | None:
+        """The learned minute of the hour new readings appear, if known."""
+        if self.observations < MIN_OBSERVATIONS:
+            return None
+        # Smooth over neighbouring minutes so a peak split across two buckets still wins
+        smoothed = [
+            self._histogram[m - 1] + 2 * self._histogram[m] + self._histogram[(m + 1) % MINUTES_PER_HOUR]
+            for m in range(MINUTES_PER_HOUR)
+        ]
+        return max(range(MINUTES_PER_HOUR), key=smoothed.__getitem__)
+
+    def record_success(self, now: datetime, changed: bool) -> None:
+        """Record a successful poll and whether it returned new data."""
+        self.failures = 0
+        if self._last_poll is not None:
+            self._observe(self._last_poll, now, changed)
+        self._misses = 0 if changed else self._misses + 1
+        self._last_poll = now
+
+    def _observe(self, start: datetime, end: datetime, changed: bool) -> None:
+        """Add or remove evidence for the minutes between two polls less than an hour apart."""
+        minutes = round((end - start).total_seconds() / 60)
+        if not 0 < minutes < MINUTES_PER_HOUR:
+            return
+        self._histogram = [v * OBSERVATION_DECAY for v in self._histogram]
+        weight = (1 if changed else -1) / minutes
+        for offset in range(minutes):
+            self._histogram[(end.minute - offset) % MINUTES_PER_HOUR] += weight
+        if changed:
+            self.observations += 1
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def record_failure(self, now: datetime, err: BaseException) -> None:
+        """Record a failed poll; the next interval backs off."""
+        self.failures += 1
+        self._last_poll = now
+        self._retry_after = _retry_after(err, now)
+
+    def _jitter(self, seconds: float) -> timedelta:
+        """Spread a delay by JITTER_FRACTION either way, without going past ``max_interval``."""
+        high = min(seconds * (1 + JITTER_FRACTION), max(seconds, self.max_interval))
+        return timedelta(seconds=random.uniform(seconds * (1 - JITTER_FRACTION), high))
+
+    def next_interval(self, now: datetime) -> timedelta:
+        """Return how long to wait before the next poll."""
+        if self.failures:
+            delay = min(self.max_interval, MAX_FAILURE_INTERVAL, FAILURE_BASE_INTERVAL * 2 ** (self.failures - 1))
+            if self._retry_after is not None and self._retry_after > delay:
+                # Never earlier than asked
+                return timedelta(seconds=self._retry_after * random.uniform(1, 1 + JITTER_FRACTION))
+            return self._jitter(delay)
+
+        minute = self.publication_minute
+        if minute is None:
+            self._learning_short_gap = not self._learning_short_gap
+            if self._learning_short_gap:
+                return self._jitter(min(LEARNING_SHORT_GAP, self.max_interval))
+            return self._jitter(self.max_interval)
+
+        window = (minute + WINDOW_MARGIN) % MINUTES_PER_HOUR
+        until_window = (window - now.minute - now.second / 60) % MINUTES_PER_HOUR * 60
+        if self._misses == 0:
+            # This hour's reading is in; the next one comes at the following window
+            if until_window < MIN_CHANGE_GAP:
+                until_window += MINUTES_PER_HOUR * 60
+        elif self._misses == 1 and until_window > (MINUTES_PER_HOUR - WINDOW_MARGIN) * 60 - LATE_RETRY_INTERVAL:
+            # The window poll found nothing; the reading is late, look once more
+            return self._jitter(LATE_RETRY_INTERVAL)
+        if until_window > self.max_interval:
+            return self._jitter(self.max_interval)
+        # Jitter only ever delays a window poll, so it cannot land before the reading appears
+        return timedelta(seconds=min(until_window * random.uniform(1, 1 + JITTER_FRACTION), self.max_interval))
@@ -1,111 +1,338 @@
 """Sensors for the Fort Worth MyH2O integration."""
 from __future__ import annotations
 
-from homeassistant.components.sensor import SensorEntity
-from homeassistant.const import CONF_USERNAME
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import CONF_USERNAME, PERCENTAGE, EntityCategory, UnitOfTime, UnitOfVolume
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    PRIMARY_ACCOUNT,
+    SIGNAL_BACKFILL_PROGRESS,
+    SIGNAL_HISTORY_IMPORTED,
+    SIGNAL_METRICS_UPDATED,
+)
+from .entity import account_device_info
+
+USAGE_SENSORS: tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(
+        key="current_reading",
+        name="Current Reading",
+        native_unit_of_measurement=UnitOfVolume.GALLONS,
+        device_class=SensorDeviceClass.WATER,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    SensorEntityDescription(
+        key="daily_usage",
+        name="Daily Usage",
+        native_unit_of_measurement=UnitOfVolume.GALLONS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="monthly_usage",
+        name="Monthly Usage",
+        native_unit_of_measurement=UnitOfVolume.GALLONS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class DiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes a poll instrumentation sensor."""
+
+    value_fn: Callable[[Any], Any]
+    attributes_fn: Callable[[Any], dict[str, Any]]
+    entity_category: EntityCategory = EntityCategory.DIAGNOSTIC
+    entity_registry_enabled_default: bool = False
+
+
+DIAGNOSTIC_SENSORS: tuple[DiagnosticSensorEntityDescription, ...] = (
+    DiagnosticSensorEntityDescription(
+        key="last_poll_duration",
+        name="Last Poll Duration",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        suggested_display_precision=2,
+        value_fn=lambda coordinator: coordinator.metrics.last_poll_seconds,
+        attributes_fn=lambda coordinator: {
+            phase: hist.as_dict()["mean"] for phase, hist in coordinator.metrics.phases.items()
+        },
+    ),
+    DiagnosticSensorEntityDescription(
+        key="http_requests",
+        name="Portal Requests",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.metrics.http_requests,
+        attributes_fn=lambda coordinator: {
+            "bytes_received": coordinator.metrics.bytes_received,
+            "bytes_decoded": coordinator.metrics.bytes_decoded,
+            "early_stops": coordinator.metrics.early_stops,
+            "login_retries": coordinator.metrics.login_retries,
+        },
+    ),
+    DiagnosticSensorEntityDescription(
+        key="parser_fallbacks",
+        name="Parser Fallbacks",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: sum(coordinator.metrics.parser_fallbacks.values()),
+        attributes_fn=lambda coordinator: {
+            **coordinator.metrics.parser_fallbacks,
+            "rejected_parses": coordinator.metrics.rejected_parses,
+        },
+    ),
+    DiagnosticSensorEntityDescription(
+        key="logins_avoided",
+        name="Logins Avoided",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.session.logins_avoided,
+        attributes_fn=lambda coordinator: {"logins": coordinator.session.logins},
+    ),
+)
 
-from .const import DOMAIN
+
+@dataclass(frozen=True, kw_only=True)
+class CostSensorEntityDescription(SensorEntityDescription):
+    """Describes a bill estimate sensor."""
+
+    value_fn: Callable[[Any], float | None]
+    device_class: SensorDeviceClass = SensorDeviceClass.MONETARY
+    suggested_display_precision: int = 2
+
+
+COST_SENSORS: tuple[CostSensorEntityDescription, ...] = (
+    # Resets at every cycle start, so the Energy dashboard can use it as the water cost
+    CostSensorEntityDescription(
+        key="cycle_cost",
+        name="Billing Cycle Cost",
+        state_class=SensorStateClass.TOTAL,
+        value_fn=lambda cost: cost.cycle_cost,
+    ),
+    CostSensorEntityDescription(
+        key="projected_cycle_cost",
+        name="Projected Billing Cycle Cost",
+        value_fn=lambda cost: cost.projected_cost,
+    ),
+)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
-    """Set up sensors for Fort Worth MyH2O integration."""
+    """Set up sensors for every account the coordinator reports."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
     unique_base = f"{entry.entry_id}_{entry.data.get(CONF_USERNAME)}"
+    known_accounts: set[str] = set()
+
+    @callback
+    def _async_add_new_accounts() -> None:
+        new_accounts = [account for account in (coordinator.data or {}) if account not in known_accounts]
+        if not new_accounts:
+            return
+        known_accounts.update(new_accounts)
+        async_add_entities(
+            UsageSensor(coordinator, unique_base, account, description)
+            for account in new_accounts
+            for description in USAGE_SENSORS
+        )
+
+    _async_add_new_accounts()
+    entry.async_on_unload(coordinator.async_add_listener(_async_add_new_accounts))
 
-    entities = [
-        CurrentReadingSensor(coordinator, unique_base),
-        DailyUsageSensor(coordinator, unique_base),
-        MonthlyUsageSensor(coordinator, unique_base),
-    ]
+    async_add_entities(DiagnosticSensor(coordinator, unique_base, description) for description in DIAGNOSTIC_SENSORS)
 
-    async_add_entities(entities, True)
+    if coordinator.history is not None:
+        async_add_entities(
+            [HistorySensor(coordinator.history, unique_base), BackfillProgressSensor(coordinator.history, unique_base)]
+        )
+        if coordinator.history.cost is not None:
+            async_add_entities(
+                CostSensor(coordinator.history, unique_base, description) for description in COST_SENSORS
+            )
 
 
-class BaseSensor(CoordinatorEntity, SensorEntity):
-    """Base sensor using DataUpdateCoordinator."""
+class UsageSensor(CoordinatorEntity, SensorEntity):
+    """A usage value of one account, written only when that value changes."""
 
-    def __init__(self, coordinator, unique_base: str, name: str, key: str):
+    def __init__(self, coordinator, unique_base: str, account: str, description: SensorEntityDescription):
         super().__init__(coordinator)
-        self._name = name
-        self._unique_id = f"{unique_base}_{key}"
-        self._key = key
-
-    @property
-    def name(self):
-        return self._name
-
-    @property
-    def unique_id(self):
-        return self._unique_id
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._unique_id)},
-            name="Fort Worth MyH2O",
-            manufacturer="City of Fort Worth",
+        self.entity_description = description
+        self._account = account
+        # The single-account layout keeps the unique ids it had before accounts were keyed
+        if account == PRIMARY_ACCOUNT:
+            self._attr_name = description.name
+            self._attr_unique_id = f"{unique_base}_{description.key}"
+        else:
+            self._attr_name = f"{description.name} {account}"
+            self._attr_unique_id = f"{unique_base}_{account}_{description.key}"
+        self._attr_device_info = account_device_info(unique_base, account)
+        self._attr_native_value = self._current_value()
+        self._last_available = coordinator.last_update_success
+
+    def _current_value(self):
+        return (self.coordinator.data or {}).get(self._account, {}).get(self.entity_description.key)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if this sensor's value or availability changed."""
+        value = self._current_value()
+        available = self.coordinator.last_update_success
+        if value == self._attr_native_value and available == self._last_available:
+            return
+        self._attr_native_value = value
+        self._last_available = available
+        self.async_write_ha_state()
+
+
+class DiagnosticSensor(SensorEntity):
+    """Poll instrumentation, refreshed after every poll whether or not it succeeded."""
+
+    _attr_should_poll = False
+    entity_description: DiagnosticSensorEntityDescription
+
+    def __init__(self, coordinator, unique_base: str, description: DiagnosticSensorEntityDescription):
+        self.coordinator = coordinator
+        self.entity_description = description
+        self._attr_name = description.name
+        self._attr_unique_id = f"{unique_base}_{description.key}"
+        self._attr_device_info = account_device_info(unique_base, PRIMARY_ACCOUNT)
+        self._attr_extra_state_attributes = {}
+        self._refresh()
+
+    def _refresh(self) -> bool:
+        """Recompute the cached value and attributes; return True if either changed."""
+        value = self.entity_description.value_fn(self.coordinator)
+        attributes = self.entity_description.attributes_fn(self.coordinator)
+        if value == self._attr_native_value and attributes == self._attr_extra_state_attributes:
+            return False
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = attributes
+        return True
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_METRICS_UPDATED.format(self.coordinator.entry.entry_id),
+                self._handle_metrics_update,
+            )
         )
 
+    @callback
+    def _handle_metrics_update(self) -> None:
+        if self._refresh():
+            self.async_write_ha_state()
+
 
-class CurrentReadingSensor(BaseSensor):
-    """Sensor for the current meter reading."""
+class HistorySensor(SensorEntity):
+    """The newest hour in long-term statistics, updated when an import writes rows."""
 
-    def __init__(self, coordinator, unique_base):
-        super().__init__(coordinator, unique_base, name="Current Reading", key="current_reading")
+    _attr_should_poll = False
+    _attr_name = "Last Imported Hour"
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
 
-    @property
-    def state(self):
-        return self.coordinator.data.get("current_reading")
+    def __init__(self, history, unique_base: str) -> None:
+        self._history = history
+        self._attr_unique_id = f"{unique_base}_last_imported_hour"
+        self._attr_device_info = account_device_info(unique_base, PRIMARY_ACCOUNT)
+        self._refresh()
 
-    @property
-    def unit_of_measurement(self):
-        return "gal"
+    def _refresh(self) -> None:
+        last_import = self._history.engine.last_import
+        last_hour = last_import.get("last_hour")
+        self._attr_native_value = dt_util.parse_datetime(last_hour) if last_hour else None
+        self._attr_extra_state_attributes = {
+            "statistic_id": self._history.statistic_id,
+            "last_import": last_import.get("finished"),
+            "rows_imported": last_import.get("rows"),
+        }
 
-    @property
-    def device_class(self):
-        return "water"
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_HISTORY_IMPORTED.format(self._history.entry.entry_id), self._handle_import
+            )
+        )
 
-    @property
-    def state_class(self):
-        return "total_increasing"
+    @callback
+    def _handle_import(self) -> None:
+        self._refresh()
+        self.async_write_ha_state()
 
 
-class DailyUsageSensor(BaseSensor):
-    """Sensor for daily water usage."""
+class BackfillProgressSensor(SensorEntity):
+    """Share of the current or last import run's missing days done, updated as each chunk completes."""
 
-    def __init__(self, coordinator, unique_base):
-        super().__init__(coordinator, unique_base, name="Daily Usage", key="daily_usage")
+    _attr_should_poll = False
+    _attr_name = "Backfill Progress"
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
 
-    @property
-    def state(self):
-        return self.coordinator.data.get("daily_usage")
+    def __init__(self, history, unique_base: str) -> None:
+        self._history = history
+        self._attr_unique_id = f"{unique_base}_backfill_progress"
+        self._attr_device_info = account_device_info(unique_base, PRIMARY_ACCOUNT)
+        self._refresh(history.engine.progress)
 
-    @property
-    def unit_of_measurement(self):
-        return "gal"
+    def _refresh(self, progress: dict[str, Any]) -> None:
+        total = progress["total_days"]
+        self._attr_native_value = round(100 * progress["completed_days"] / total) if total else None
+        self._attr_extra_state_attributes = dict(progress)
 
-    @property
-    def state_class(self):
-        return "measurement"
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_BACKFILL_PROGRESS.format(self._history.entry.entry_id), self._handle_progress
+            )
+        )
 
+    @callback
+    def _handle_progress(self, progress: dict[str, Any]) -> None:
+        self._refresh(progress)
+        self.async_write_ha_state()
 
-class MonthlyUsageSensor(BaseSensor):
-    """Sensor for monthly water usage."""
 
-    def __init__(self, coordinator, unique_base):
-        super().__init__(coordinator, unique_base, name="Monthly Usage", key="monthly_usage")
+class CostSensor(SensorEntity):
+    """A bill estimate, updated when an import adds usage."""
 
-    @property
-    def state(self):
-        return self.coordinator.data.get("monthly_usage")
+    _attr_should_poll = False
+    entity_description: CostSensorEntityDescription
+
+    def __init__(self, history, unique_base: str, description: CostSensorEntityDescription) -> None:
+        self._history = history
+        self.entity_description = description
+        self._attr_name = description.name
+        self._attr_unique_id = f"{unique_base}_{description.key}"
+        self._attr_device_info = account_device_info(unique_base, PRIMARY_ACCOUNT)
+
+    async def async_added_to_hass(self) -> None:
+        self._attr_native_unit_of_measurement = self.hass.config.currency
+        self._refresh()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_HISTORY_IMPORTED.format(self._history.entry.entry_id), self._handle_import
+            )
+        )
 
-    @property
-    def unit_of_measurement(self):
-        return "gal"
+    def _refresh(self) -> None:
+        cost = self._history.cost
+        self._attr_native_value = self.entity_description.value_fn(cost)
+        self._attr_extra_state_attributes = cost.attributes
+        if self.entity_description.state_class == SensorStateClass.TOTAL:
+            self._attr_last_reset = cost.cycle_started
 
-    @property
-    def state_class(self):
-        return "measurement"
+    @callback
+    def _handle_import(self) -> None:
+        self._refresh()
+        self.async_write_ha_state()
@@ -0,0 +1,254 @@
+"""Authenticated portal session that is reused across polls and restarts."""
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+import logging
+import re
+from http import HTTPStatus
+from http.cookies import SimpleCookie
+
+from aiohttp import ClientResponse, ClientSession, CookieJar, hdrs
+from yarl import URL
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .client import async_read_body, get_http_client
+from .const import (
+    ACCOUNT_FETCH_CONCURRENCY,
+    DOMAIN,
+    HOURLY_USAGE_URL,
+    LOGIN_URL,
+    MAX_BODY_BYTES,
+    PORTAL_HOST,
+    STORAGE_VERSION,
+    USAGE_URL,
+)
+from .executor import async_run_parser
+from .metrics import PHASE_FETCH, PHASE_LOGIN, PHASE_PARSE, PollMetrics
+from .parser import LOGIN_PAGE_MARKERS, USAGE_PAGE_MARKERS, ServiceSelector, parse_hidden_fields
+
+_LOGGER = logging.getLogger(__name__)
+
+USERNAME_FIELD = "ctl00$ContentPlaceHolder1$txtUsername"
+PASSWORD_FIELD = "ctl00$ContentPlaceHolder1$txtPassword"
+
+
+def parse_login_form(html: str) -> dict[str, str]:
+    """Return the named inputs of the login page, including ASP.NET hidden fields."""
+    # Only needed for a login, which runs in the executor, so not imported at startup
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    return {inp.get("name"): inp.get("value", "") for inp in soup.find_all("input") if inp.get("name")}
+
+
+class MyH2OAuthError(Exception):
+    """Raised when the portal still asks for a login after we submitted one."""
+
+
+class MyH2OSession:
+    """Keep the portal cookie jar between polls and log in only when it has expired."""
+
+    def __init__(
+        self, hass: HomeAssistant, entry_id: str, username: str, password: str, metrics: PollMetrics | None = None
+    ) -> None:
+        self.hass = hass
+        self.metrics = metrics or PollMetrics()
+        self.username = username
+        self.password = password
+        self.session: ClientSession | None = None
+        self._client = get_http_client(hass)
+        self._cookie_jar = CookieJar()
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.session")
+
+        # Counters for the most recent poll and since startup
+        self.logins = 0
+        self.logins_avoided = 0
+        self.last_poll_logins = 0
+        self.last_login_parse_seconds: float | None = None
+        self._login_lock = asyncio.Lock()
+        # Validators from the last usage page, for conditional requests
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+
+    async def async_load(self) -> None:
+        """Restore cookies saved by a previous run."""
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        for item in stored.get("cookies", []):
+            cookie = SimpleCookie()
+            cookie[item["key"]] = item["value"]
+            cookie[item["key"]]["path"] = item.get("path") or "/"
+            self._cookie_jar.update_cookies(cookie, URL(f"https://{item.get('domain') or PORTAL_HOST}/"))
+        _LOGGER.debug("Restored %d portal cookies for %s", len(self._cookie_jar), self.username)
+
+    async def async_save(self) -> None:
+        """Persist the current cookie jar so a restart can skip the login."""
+        cookies = [
+            {"key": morsel.key, "value": morsel.value, "domain": morsel["domain"], "path": morsel["path"]}
+            for morsel in self._cookie_jar
+        ]
+        await self._store.async_save({"cookies": cookies})
+
+    async def async_close(self) -> None:
+        # The session shares Home Assistant's connector, so it is detached rather than closed
+        if self.session and not self.session.closed:
+            self.session.detach()
+        self.session = None
+
+    def _get_session(self) -> ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = self._client.create_session(self._cookie_jar)
+        return self.session
+
+    async def _async_request(
+        self, method: str, url: str, stop_after: tuple[re.Pattern[bytes], ...] = (), **kwargs
+    ) -> tuple[str, ClientResponse]:
+        """Send a request and return its decoded text.
+
+        ``stop_after`` are the markers of the part of the page we use; see
+        ``client.async_read_body``.
+        """
+        async with self._client.request(self._get_session(), method, url, **kwargs) as resp:
+            resp.raise_for_status()
+            body = await async_read_body(resp, MAX_BODY_BYTES, stop_after)
+            self.metrics.record_response(body.wire_bytes, len(body.data), body.stopped_early)
+            return body.data.decode(resp.charset or "utf-8", errors="replace"), resp
+
+    async def _async_get(self, url: str, **kwargs) -> tuple[str, ClientResponse]:
+        return await self._async_request("GET", url, **kwargs)
+
+    async def _async_post(self, url: str, **kwargs) -> tuple[str, ClientResponse]:
+        return await self._async_request("POST", url, **kwargs)
+
+    @staticmethod
+    def _is_login_page(html: str, resp: ClientResponse) -> bool:
+        """Return True if the portal redirected us to the login form."""
+        if "login.aspx" in resp.url.path.lower():
+            return True
+        if any("login.aspx" in r.url.path.lower() for r in resp.history):
+            return True
+        return PASSWORD_FIELD in html
+
+    async def _async_login(self) -> None:
+        """Submit the login form and persist the resulting cookies."""
+        with self.metrics.timer(PHASE_LOGIN):
+            html, _ = await self._async_get(LOGIN_URL, stop_after=LOGIN_PAGE_MARKERS)
+            form, self.last_login_parse_seconds = await async_run_parser(self.hass, parse_login_form, html)
+            self.metrics.observe(PHASE_PARSE, self.last_login_parse_seconds)
+
+            form.update({
+                USERNAME_FIELD: self.username,
+                PASSWORD_FIELD: self.password,
+            })
+
+            await self._async_post(LOGIN_URL, data=form)
+        self.logins += 1
+        self.last_poll_logins += 1
+        await self.async_save()
+
+    async def _async_login_unless_done(self, logins_seen: int) -> None:
+        """Log in unless another request already did since ``logins_seen`` was read.
+
+        Concurrent requests that find the session expired then share one login.
+        """
+        async with self._login_lock:
+            if self.logins == logins_seen:
+                await self._async_login()
+
+    def _conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self._etag:
+            headers[hdrs.IF_NONE_MATCH] = self._etag
+        if self._last_modified:
+            headers[hdrs.IF_MODIFIED_SINCE] = self._last_modified
+        return headers
+
+    def _remember_validators(self, resp: ClientResponse) -> None:
+        self._etag = resp.headers.get(hdrs.ETAG)
+        self._last_modified = resp.headers.get(hdrs.LAST_MODIFIED)
+
+    async def async_fetch_usage(self, conditional: bool = False) -> str | None:
+        """Return the usage page HTML, logging in only if the saved session has expired.
+
+        With ``conditional`` set, the request carries the ETag/Last-Modified
+        validators of the previous page and None is returned when the portal
+        answers 304 Not Modified.
+        """
+        self.last_poll_logins = 0
+        logins_seen = self.logins
+
+        if len(self._cookie_jar):
+            headers = self._conditional_headers() if conditional else {}
+            with self.metrics.timer(PHASE_FETCH):
+                html, resp = await self._async_get(USAGE_URL, stop_after=USAGE_PAGE_MARKERS, headers=headers)
+            if resp.status == HTTPStatus.NOT_MODIFIED:
+                self.logins_avoided += 1
+                return None
+            if not self._is_login_page(html, resp):
+                self.logins_avoided += 1
+                self._remember_validators(resp)
+                return html
+            _LOGGER.debug("Portal session for %s expired, logging in again", self.username)
+            self.metrics.login_retries += 1
+
+        await self._async_login_unless_done(logins_seen)
+        with self.metrics.timer(PHASE_FETCH):
+            html, resp = await self._async_get(USAGE_URL, stop_after=USAGE_PAGE_MARKERS)
+        if self._is_login_page(html, resp):
+            raise MyH2OAuthError("Portal did not accept the login")
+        self._remember_validators(resp)
+        return html
+
+    async def async_fetch_accounts(self, html: str, selector: ServiceSelector, accounts: list[str]) -> dict[str, str]:
+        """Post the usage page back once per account and return each account's HTML.
+
+        Every post reuses the hidden fields of the page we already have, so no
+        extra login or GET is needed. At most ACCOUNT_FETCH_CONCURRENCY posts
+        are in flight at once.
+        """
+        hidden, _ = await async_run_parser(self.hass, parse_hidden_fields, html)
+        semaphore = asyncio.Semaphore(ACCOUNT_FETCH_CONCURRENCY)
+
+        async def _fetch(account: str) -> tuple[str, str]:
+            form = {**hidden, "__EVENTTARGET": selector.field, "__EVENTARGUMENT": "", selector.field: account}
+            async with semaphore:
+                with self.metrics.timer(PHASE_FETCH):
+                    page, _ = await self._async_post(USAGE_URL, stop_after=USAGE_PAGE_MARKERS, data=form)
+            return account, page
+
+        return dict(await asyncio.gather(*(_fetch(account) for account in accounts)))
+
+    async def async_fetch_hourly(self, day: date, meter: str = "") -> str:
+        """Return the raw JSON of the usage chart's hourly data for ``day``.
+
+        Uses the current portal session and logs in again only if the portal
+        bounces the request to the login page.
+        """
+        payload = {
+            "Type": "W",
+            "Mode": "H",
+            "strDate": day.strftime("%m/%d/%Y"),
+            "hourlyType": "H",
+            "seasonId": "",
+            "weatherOverlay": 0,
+            "usageyear": "",
+            "MeterNumber": meter,
+            "DateFromDaily": "",
+            "DateToDaily": "",
+        }
+        logins_seen = self.logins
+        for attempt in range(2):
+            if attempt:
+                self.metrics.login_retries += 1
+            if attempt or not len(self._cookie_jar):
+                await self._async_login_unless_done(logins_seen)
+            logins_seen = self.logins
+            with self.metrics.timer(PHASE_FETCH):
+                body, resp = await self._async_post(HOURLY_USAGE_URL, json=payload)
+            if not self._is_login_page(body, resp):
+                return body
+        raise MyH2OAuthError("Portal did not accept the login")
@@ -0,0 +1,146 @@
+"""Client-side protection for the portal: a token-bucket rate limiter and a circuit breaker."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The portal is failing and requests are short-circuited until the next probe."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"Portal circuit breaker is open, next probe in {retry_after:.0f} seconds")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Allow ``rate`` requests per second on average with bursts of up to ``capacity``.
+
+    Waiters are served one at a time in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waits = 0
+
+    def configure(self, rate: float, capacity: int) -> None:
+        self._refill()
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = min(self._tokens, capacity)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def async_acquire(self) -> None:
+        """Take one token, sleeping until one is available."""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                self.waits += 1
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def as_dict(self) -> dict[str, Any]:
+        self._refill()
+        return {
+            "requests_per_minute": self.rate * 60,
+            "burst": self.capacity,
+            "tokens": round(self._tokens, 2),
+            "waits": self.waits,
+        }
+
+
+class CircuitBreaker:
+    """Stop calling the portal after repeated failures, then probe it one request at a time.
+
+    After ``threshold`` consecutive failures the circuit opens and requests
+    fail fast. Once ``reset_timeout`` has passed a single probe is let
+    through (half-open); success closes the circuit, failure reopens it with
+    the timeout doubled up to ``max_reset_timeout``.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float, max_reset_timeout: float) -> None:
+        self.threshold = threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self.trips = 0
+        self._reset_timeout = reset_timeout
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def _remaining(self) -> float:
+        return max(0.0, self._opened_at + self._reset_timeout - time.monotonic())
+
+    def before_request(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent now."""
+        if self.state == STATE_CLOSED:
+            return
+        if self.state == STATE_OPEN and not self._remaining():
+            self.state = STATE_HALF_OPEN
+            _LOGGER.debug("Portal circuit breaker half-open, sending a probe")
+        if self.state == STATE_HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self._remaining() or self._reset_timeout)
+
+    def record_success(self) -> None:
+        if self.state != STATE_CLOSED:
+            _LOGGER.info("Portal is responding again, closing the circuit breaker")
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self._reset_timeout = self.base_reset_timeout
+        self._probe_in_flight = False
+
+    def record_failure(self, retry_after: float | None = None) -> None:
+        self.failures += 1
+        if self.state == STATE_OPEN:
+            # A request sent before the circuit opened
+            return
+        if self.state == STATE_HALF_OPEN:
+            self._reset_timeout = min(self.max_reset_timeout, self._reset_timeout * 2)
+        elif self.failures < self.threshold:
+            return
+        if retry_after:
+            self._reset_timeout = max(self._reset_timeout, retry_after)
+        self.state = STATE_OPEN
+        self.trips += 1
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        _LOGGER.warning(
+            "Portal failed %d time(s) in a row, pausing requests for %.0f seconds", self.failures, self._reset_timeout
+        )
+
+    def release_probe(self) -> None:
+        """Let another probe through when one ended without an outcome (e.g. it was cancelled)."""
+        self._probe_in_flight = False
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "threshold": self.threshold,
+            "reset_timeout": self._reset_timeout,
+            "next_probe_in": round(self._remaining(), 1) if self.state == STATE_OPEN else None,
+            "trips": self.trips,
+            "rejected_requests": self.rejected,
+        }
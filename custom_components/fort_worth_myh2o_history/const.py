@@ -1,11 +0,0 @@
-{
-  "domain": "fort_worth_myh2o_history",
-  "name": "FWMyH2O History Importer",
-  "version": "0.1.1",
-  "requirements": [
-    "beautifulsoup4>=4.11.1",
-    "requests>=2.28.1"
-  ],
-  "dependencies": [],
-  "codeowners": []
-}
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""Backfill against the portal simulator and a real recorder: gaps anywhere in the window are filled."""
+from __future__ import annotations
+
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("sqlalchemy")
+
+import homeassistant.util.dt as dt_util  # noqa: E402
+from homeassistant.components.recorder import get_instance  # noqa: E402
+from homeassistant.components.recorder.statistics import statistics_during_period  # noqa: E402
+
+from harness import (  # noqa: E402
+    PortalSimulator,
+    async_recorder_done,
+    async_start_hass,
+    async_start_recorder,
+    create_coordinator,
+    make_entry,
+    point_integration_at,
+    set_rate_limit,
+)
+from portal_sim import hourly_usage  # noqa: E402
+
+from custom_components.fort_worth_myh2o.backfill import BackfillEngine  # noqa: E402
+from custom_components.fort_worth_myh2o.cache import ReadingCache  # noqa: E402
+from custom_components.fort_worth_myh2o.historical_import import statistic_id_for  # noqa: E402
+
+FIRST = date(2026, 6, 1)
+LAST = FIRST + timedelta(days=11)
+
+
+async def _async_hourly_rows(hass, statistic_id: str) -> list[dict]:
+    await async_recorder_done(hass)
+    stats = await get_instance(hass).async_add_executor_job(
+        statistics_during_period, hass, dt_util.utc_from_timestamp(0), None, {statistic_id}, "hour", None, {"sum"}
+    )
+    return stats.get(statistic_id, [])
+
+
+async def _async_backfill(runs: list[tuple[date, int]]) -> tuple[list[dict], list]:
+    """Run the backfill engine once per (end, days) and return the statistic rows and each run's result."""
+    hass = await async_start_hass()
+    await async_start_recorder(hass)
+    set_rate_limit(hass, 0)
+    sim = PortalSimulator()
+    point_integration_at(await sim.start())
+    entry = make_entry("test")
+    coordinator = create_coordinator(hass, entry)
+    statistic_id = statistic_id_for("test")
+    engine = BackfillEngine(hass, entry.entry_id, statistic_id, coordinator.session, ReadingCache(hass, "test"))
+    try:
+        await engine.async_load()
+        results = []
+        for end, days in runs:
+            results.append(await engine.async_run(days, end))
+            await async_recorder_done(hass)
+        return await _async_hourly_rows(hass, statistic_id), results
+    finally:
+        await coordinator.async_shutdown()
+        await sim.stop()
+        await hass.async_stop()
+
+
+def _assert_continuous(rows: list[dict]) -> None:
+    """Every day from FIRST to LAST is there, and each hour's sum grows by that hour's usage."""
+    usage = [value for offset in range((LAST - FIRST).days + 1) for value in hourly_usage(FIRST + timedelta(days=offset))]
+    assert len(rows) == len(usage)
+    assert rows[0]["start"] == dt_util.start_of_local_day(FIRST).timestamp()
+    previous = 0.0
+    for row, value in zip(rows, usage):
+        assert row["sum"] - previous == pytest.approx(value, abs=1e-6)
+        previous = row["sum"]
+
+
+def test_backfill_fills_days_before_the_first_imported_hour() -> None:
+    rows, results = asyncio.run(_async_backfill([(LAST, 5), (LAST, 12)]))
+    assert [result.rows for result in results] == [5 * 24, 7 * 24]
+    assert all(result.stopped_at is None for result in results)
+    _assert_continuous(rows)
+
+
+def test_backfill_fills_a_gap_between_imported_days() -> None:
+    runs = [(FIRST + timedelta(days=2), 3), (LAST, 4), (LAST, 12)]
+    rows, results = asyncio.run(_async_backfill(runs))
+    assert [result.rows for result in results] == [3 * 24, 4 * 24, 5 * 24]
+    _assert_continuous(rows)
+
+
+def test_backfill_skips_complete_days() -> None:
+    rows, results = asyncio.run(_async_backfill([(LAST, 12), (LAST, 12)]))
+    assert [result.rows for result in results] == [12 * 24, 0]
+    _assert_continuous(rows)
@@ -0,0 +1,46 @@
+"""Checks that a usage spike stays flagged after the rest of its day is imported."""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+import homeassistant.util.dt as dt_util  # noqa: E402
+
+from harness import async_start_hass  # noqa: E402
+
+from custom_components.fort_worth_myh2o.const import EVENT_LEAK_DETECTED  # noqa: E402
+from custom_components.fort_worth_myh2o.leak import LeakDetector  # noqa: E402
+
+BASELINE_DAYS = 8
+SPIKE_HOUR = 8
+
+
+async def _async_feed_spike_day() -> tuple[LeakDetector, list[dict], float]:
+    """Feed quiet days, then a day with one spike hour; return the detector, its events and the spike hour."""
+    hass = await async_start_hass()
+    events: list[dict] = []
+    hass.bus.async_listen(EVENT_LEAK_DETECTED, lambda event: events.append(event.data))
+    detector = LeakDetector(hass, "test")
+    first = dt_util.start_of_local_day(dt_util.now() - timedelta(days=BASELINE_DAYS + 1))
+    try:
+        for hour in range((BASELINE_DAYS + 1) * 24):
+            start = (first + timedelta(hours=hour)).timestamp()
+            spike = hour == BASELINE_DAYS * 24 + SPIKE_HOUR
+            # Usage stops for an hour every night, so the flow never looks continuous
+            detector.async_update(start, 500.0 if spike else float(hour % 24 != 3) * 10.0)
+        await hass.async_block_till_done()
+        return detector, events, (first + timedelta(days=BASELINE_DAYS, hours=SPIKE_HOUR)).timestamp()
+    finally:
+        await hass.async_stop(force=True)
+
+
+def test_spike_stays_on_until_the_end_of_its_day() -> None:
+    detector, events, spike_start = asyncio.run(_async_feed_spike_day())
+    assert detector.spike
+    assert not detector.continuous_flow
+    assert detector.attributes["spike_hour"] == dt_util.utc_from_timestamp(spike_start).isoformat()
+    assert [event["type"] for event in events] == ["spike"]
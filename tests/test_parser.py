@@ -0,0 +1,54 @@
+"""Checks that doubtful usage values are never published as the meter reading."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from harness import async_start_hass, create_coordinator, make_entry  # noqa: E402
+
+from custom_components.fort_worth_myh2o.parser import extract_usage  # noqa: E402
+
+TOTAL_ONLY_PAGE = "<html><body><div>Total Usage: 1,234 gal</div><div>Last 24 Hours: 150 gal</div></body></html>"
+
+
+async def _async_parse_first(html: str) -> dict:
+    """Parse ``html`` as an entry's first usage page, with no previous good data."""
+    hass = await async_start_hass()
+    coordinator = create_coordinator(hass, make_entry("test"))
+    try:
+        return await coordinator._async_parse_usage("primary", html)
+    finally:
+        await coordinator.async_shutdown()
+        await hass.async_stop(force=True)
+
+
+def test_total_label_is_not_published_as_reading() -> None:
+    extraction = extract_usage(TOTAL_ONLY_PAGE)
+    assert extraction.confidence["current_reading"] < 1.0
+
+    data = asyncio.run(_async_parse_first(TOTAL_ONLY_PAGE))
+    assert data["current_reading"] is None
+    assert data["daily_usage"] == 150.0
+
+
+def test_meter_number_is_not_published_as_reading() -> None:
+    data = asyncio.run(_async_parse_first("<div>Meter Number 99887766</div>"))
+    assert data["current_reading"] is None
+
+
+def test_meter_reading_label_is_published() -> None:
+    data = asyncio.run(_async_parse_first("<div>Meter Reading: 123,456</div>"))
+    assert data["current_reading"] == 123456.0
+
+
+def test_element_id_must_end_at_the_label_name() -> None:
+    html = (
+        '<span id="ctl00_lblMeterReadDate">20260601</span>'
+        '<span id="ctl00_ContentPlaceHolder1_lblMeterRead">123,456</span>'
+    )
+    extraction = extract_usage("", html)
+    assert extraction.data["current_reading"] == 123456.0
+    assert extraction.confidence["current_reading"] == 1.0
@@ -0,0 +1,131 @@
+"""End-to-end checks against the offline portal simulator.
+
+Each test starts a bare Home Assistant core and the simulator from the
+benchmark harness, drives the real integration and asserts on what the
+simulator saw. Run with plain ``pytest`` from the repository root; Home
+Assistant and aiohttp must be installed.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("aiohttp")
+
+from harness import (  # noqa: E402
+    PortalSimulator,
+    async_start_hass,
+    create_coordinator,
+    make_entry,
+    point_integration_at,
+    set_rate_limit,
+)
+
+from custom_components.fort_worth_myh2o.cache import ReadingCache  # noqa: E402
+from custom_components.fort_worth_myh2o.const import PRIMARY_ACCOUNT  # noqa: E402
+from custom_components.fort_worth_myh2o.fetcher import async_fetch_cumulative_readings_for_date  # noqa: E402
+from custom_components.fort_worth_myh2o.historical_import import ImportedStatistics, _build_rows  # noqa: E402
+from custom_components.fort_worth_myh2o.rollup import PERIODS, RollupIndex  # noqa: E402
+
+
+async def _async_with_portal(test, **sim_options) -> None:
+    """Run ``test(hass, sim, entry, coordinator)`` against a fresh simulator."""
+    hass = await async_start_hass()
+    set_rate_limit(hass, 0)
+    sim = PortalSimulator(**sim_options)
+    point_integration_at(await sim.start())
+    entry = make_entry("test")
+    coordinator = create_coordinator(hass, entry)
+    try:
+        await test(hass, sim, entry, coordinator)
+    finally:
+        await coordinator.async_shutdown()
+        await sim.stop()
+        await hass.async_stop(force=True)
+
+
+async def _async_poll(coordinator) -> None:
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success, coordinator.last_exception
+
+
+def test_unchanged_poll_makes_one_request_and_no_login() -> None:
+    async def test(hass, sim, entry, coordinator):
+        await _async_poll(coordinator)
+        requests, logins = sim.total_requests, sim.logins
+        await _async_poll(coordinator)
+        assert sim.total_requests - requests == 1
+        assert sim.logins - logins == 0
+        assert coordinator.skipped_parses == 1
+
+    asyncio.run(_async_with_portal(test))
+
+
+def test_expired_session_logs_in_once() -> None:
+    async def test(hass, sim, entry, coordinator):
+        await _async_poll(coordinator)
+        previous = coordinator.data
+        sim.expire_sessions()
+        sim.publish()
+        logins = sim.logins
+        await _async_poll(coordinator)
+        assert sim.logins - logins == 1
+        assert coordinator.data != previous
+
+    asyncio.run(_async_with_portal(test))
+
+
+def test_single_account_selector_keeps_primary_account() -> None:
+    async def test(hass, sim, entry, coordinator):
+        await _async_poll(coordinator)
+        assert list(coordinator.data) == [PRIMARY_ACCOUNT]
+        assert coordinator.data[PRIMARY_ACCOUNT]["current_reading"] is not None
+
+    asyncio.run(_async_with_portal(test, single_account_selector=True))
+
+
+def test_restored_start_makes_no_requests() -> None:
+    async def test(hass, sim, entry, coordinator):
+        await _async_poll(coordinator)
+        # Shutting down saves the data the restarted entry restores
+        await coordinator.async_shutdown()
+        requests = sim.total_requests
+        restarted = create_coordinator(hass, entry)
+        try:
+            assert await restarted.async_restore()
+            assert restarted.data == coordinator.data
+        finally:
+            await restarted.async_shutdown()
+        assert sim.total_requests == requests
+
+    asyncio.run(_async_with_portal(test))
+
+
+def test_import_rows_and_rollup_totals_agree() -> None:
+    # Fixed summer days, so no DST change shortens or lengthens one
+    days = [date(2026, 6, 1) + timedelta(days=offset) for offset in range(14)]
+
+    async def test(hass, sim, entry, coordinator):
+        cache = ReadingCache(hass, "test")
+        await cache.async_load()
+        batches = [await async_fetch_cumulative_readings_for_date(coordinator.session, day, cache) for day in days]
+        # Every complete day is now cached, so fetching again needs no request
+        requests = sim.total_requests
+        cached = [await async_fetch_cumulative_readings_for_date(coordinator.session, day, cache) for day in days]
+        assert sim.total_requests == requests
+        assert cached == batches
+
+        rollups = RollupIndex(hass, entry.entry_id, 1)
+        rows, adjustments, anomalies = _build_rows(batches, ImportedStatistics([], []), rollups=rollups)
+        assert not anomalies
+        assert not adjustments
+        assert len(rows) == sum(map(len, batches)) == len(days) * 24
+        usage = sum(reading.usage for readings in batches for reading in readings)
+        assert rows[-1]["sum"] == pytest.approx(usage)
+        for period in PERIODS:
+            assert rollups.query(period)["total"] == pytest.approx(usage), period
+
+    asyncio.run(_async_with_portal(test))
@@ -0,0 +1,45 @@
+"""Checks that removing a config entry deletes everything it saved."""
+from __future__ import annotations
+
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from homeassistant import config_entries  # noqa: E402
+from homeassistant.helpers.storage import Store  # noqa: E402
+
+from harness import async_start_hass, make_entry  # noqa: E402
+
+from custom_components.fort_worth_myh2o import ENTRY_STORES, async_remove_entry  # noqa: E402
+from custom_components.fort_worth_myh2o.cache import ReadingCache  # noqa: E402
+from custom_components.fort_worth_myh2o.const import DOMAIN, STORAGE_VERSION  # noqa: E402
+
+
+async def _async_remove_saved_entry() -> list[str]:
+    """Save every store and the reading cache of an entry, remove it and return the paths left behind."""
+    hass = await async_start_hass()
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    entry = make_entry("test")
+    try:
+        stores = [Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.{name}") for name in ENTRY_STORES]
+        for store in stores:
+            await store.async_save({"saved": True})
+        cache_path = ReadingCache(hass, "test").path
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, "wb") as file:
+            file.write(b"\0" * 32)
+        paths = [store.path for store in stores] + [cache_path]
+        assert all(os.path.exists(path) for path in paths)
+
+        await async_remove_entry(hass, entry)
+        return [path for path in paths if os.path.exists(path)]
+    finally:
+        await hass.async_stop(force=True)
+
+
+def test_remove_entry_deletes_stores_and_reading_cache() -> None:
+    assert asyncio.run(_async_remove_saved_entry()) == []